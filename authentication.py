@@ -1,15 +1,14 @@
 from datetime import datetime, timedelta
 from typing import Optional
 
-from database import get_db, get_user_collection
+from database import get_async_user_collection, get_db
 from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 
 from models import Token
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from password_hashing import PasswordHasherBusy, password_hasher
+from token_cache import token_cache
 
 collection = get_db()
 
@@ -36,13 +35,12 @@ class AuthCustom:
             token = creds.credentials
             try:
                 # Verify the token
-                payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-                email = payload.get("email")
-                if email is None:
+                token_data = verify_token(token)
+                if token_data is None:
                     raise HTTPException(
                         status_code=401, detail="Email not found in token"
                     )
-                return {"email": email}
+                return {"email": token_data.email}
             except JWTError:
                 raise HTTPException(status_code=401, detail="Invalid token")
         else:
@@ -56,15 +54,31 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 120
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str):
+    try:
+        return await password_hasher.verify_and_update(plain_password, hashed_password)
+    except PasswordHasherBusy as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many login attempts, please retry",
+            headers={"Retry-After": str(e.retry_after)},
+        )
 
 
-def authenticate_user(email: str, password: str):
-    user_collection = get_user_collection()
-    user = user_collection.find_one({"email": email})
-    if not user or not verify_password(password, user["password"]):
+async def authenticate_user(email: str, password: str):
+    user_collection = get_async_user_collection()
+    user = await user_collection.find_one({"email": email})
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    valid, new_hash = await verify_password(password, user["password"])
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        # Stored with an older bcrypt cost; swap it unless the password changed meanwhile
+        await user_collection.update_one(
+            {"_id": user["_id"], "password": user["password"]},
+            {"$set": {"password": new_hash}},
+        )
     return user
 
 
@@ -82,6 +96,25 @@ def create_access_token(
     return encoded_jwt
 
 
+def verify_token(token: str) -> Optional[Token]:
+    """Decode and verify ``token``, reusing an earlier verification while it is cached.
+
+    Returns None when the token has no email and raises JWTError when it is invalid.
+    """
+    token_data = token_cache.get(token)
+    if token_data is not None:
+        return token_data
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    email = payload.get("email")
+    if email is None:
+        return None
+    token_data = Token(access_token=token, token_type="bearer", email=email)
+    # Only valid tokens are cached, so garbage tokens cannot flush real ones
+    if payload.get("exp"):
+        token_cache.put(token, token_data, payload["exp"])
+    return token_data
+
+
 def get_current_user(token: HTTPAuthorizationCredentials = Depends(security)) -> Token:
     credentials_exception = HTTPException(
         status_code=401,
@@ -92,13 +125,9 @@ def get_current_user(token: HTTPAuthorizationCredentials = Depends(security)) ->
         raise credentials_exception
 
     try:
-        payload = jwt.decode(token.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("email")
-        if email is None:
+        token_data = verify_token(token.credentials)
+        if token_data is None:
             raise credentials_exception
-        token_data = Token(
-            access_token=token.credentials, token_type="bearer", email=email
-        )
         return token_data
     except JWTError:
         raise credentials_exception
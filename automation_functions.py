@@ -1,29 +1,228 @@
 import asyncio
 import csv
 import os
-import pickle
 import time
+from collections import OrderedDict
 from enum import Enum
 from io import StringIO
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
-import requests
-from bs4 import BeautifulSoup
 from fastapi import UploadFile
-from selenium import webdriver
 from selenium.common.exceptions import (
     ElementNotInteractableException,
     NoSuchElementException,
+    WebDriverException,
 )
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support import expected_conditions as ec
 from selenium.webdriver.support.ui import WebDriverWait
-from webdriver_manager.chrome import ChromeDriverManager
 
-profile_queue = []
+from avatar_fetcher import avatar_fetcher
+from batch_runs import CheckpointStatus, batch_runs
+from browser_profiles import BULK_PROFILE, DEFAULT_PROFILE
+from contact_store import contact_store
+from database import get_user_profilecollection
+from driver_pool import driver_pool
+from functions import invalidate_user_profile
+from html_parsers import find_list_items, parse_list_item
+from job_queue import JobStatus, linkedin_queue
+from pagination import Paginator, print_progress
+from rate_scheduler import (
+    ACTION_CONNECT,
+    ACTION_FOLLOW,
+    ACTION_LIKE,
+    ACTION_MESSAGE,
+    RateLimited,
+    rate_scheduler,
+)
+from session_store import is_logged_in_url, session_store
+from wait_engine import (
+    WaitTimeout,
+    any_element_present,
+    human_pacing,
+    wait_for_document_ready,
+    wait_for_element,
+    wait_until,
+)
+
+CONNECT_MODAL_TIMEOUT = 5
+LOGIN_TIMEOUT = 20
+LINKEDIN_FEED_URL = "https://www.linkedin.com/feed"
+
+# "html" ships each card's markup to Python for parsing, "json" reads the fields in the
+# browser and ships one compact record per card
+EXTRACTION_HTML = "html"
+EXTRACTION_JSON = "json"
+DEFAULT_EXTRACTION_MODE = os.getenv("LIST_EXTRACTION_MODE", EXTRACTION_HTML)
+
+# Field name -> [CSS selector, attribute]; a null attribute means the stripped text
+CARD_FIELDS = {
+    "connections": {
+        "name": ["span.mn-connection-card__name", None],
+        "profile_link": ["a.mn-connection-card__link", "href"],
+    },
+    "following": {
+        "name": ["span.entity-result__title-text", None],
+        "occupation": ["div.entity-result__primary-subtitle", None],
+        "profile_link": ["a.app-aware-link", "href"],
+        "avatar_url": ["img.presence-entity__image", "src"],
+    },
+    "followers": {
+        "name": ["span.entity-result__title-text", None],
+        "occupation": ["div.entity-result__primary-subtitle", None],
+    },
+}
+
+
+class IncompleteCard(Exception):
+    """A list card lacks a field the scrape needs; raised the same way in both modes."""
+
+
+def _require_fields(record, kind, fields):
+    missing = [field for field in fields if record[field] is None]
+    if missing:
+        raise IncompleteCard(f"{kind} card without {', '.join(missing)}")
+
+# One record per list item from index arguments[1] onwards. Text is joined the way
+# BeautifulSoup's get_text(strip=True) does it so both modes return the same values.
+LIST_RECORDS_SCRIPT = """
+const [selector, start, fields] = arguments;
+const strippedText = (element) => {
+    const walker = document.createTreeWalker(element, NodeFilter.SHOW_TEXT);
+    const parts = [];
+    while (walker.nextNode()) {
+        const text = walker.currentNode.nodeValue.trim();
+        if (text) parts.push(text);
+    }
+    return parts.join("");
+};
+const items = document.querySelectorAll(selector);
+const records = [];
+for (let i = start; i < items.length; i++) {
+    const record = {};
+    for (const [name, [css, attribute]] of Object.entries(fields)) {
+        const element = items[i].querySelector(css);
+        if (!element) {
+            record[name] = null;
+        } else if (attribute) {
+            record[name] = element.getAttribute(attribute);
+        } else {
+            record[name] = strippedText(element);
+        }
+    }
+    records.push(record);
+}
+return records;
+"""
+
+LIST_CONTAINER_CLASS = "scaffold-finite-scroll__content"
+SHOW_MORE_XPATH = "//button[contains(@class, 'artdeco-button') and .//span[text()='Show more results']]"
+
+# Returns the outer HTML of list items from index arguments[1] onwards
+NEW_LIST_ITEMS_SCRIPT = """
+const items = document.querySelectorAll(arguments[0]);
+const html = [];
+for (let i = arguments[1]; i < items.length; i++) {
+    html.push(items[i].outerHTML);
+}
+return html;
+"""
+
+# Profile (or company) header actions are rendered once the page is usable
+profile_actions_ready = any_element_present(
+    (By.CSS_SELECTOR, ".pvs-sticky-header-profile-actions"),
+    (By.CSS_SELECTOR, ".pvs-profile-actions"),
+    (By.CSS_SELECTOR, ".org-top-card-primary-actions"),
+)
+more_actions_open = any_element_present(
+    (By.XPATH, '//div[contains(@class, "artdeco-dropdown__item")]'),
+)
+invitation_modal_open = any_element_present(
+    (By.XPATH, "//button[@aria-label='Send without a note']"),
+    (By.XPATH, "//button[@aria-label='Add a note']"),
+)
+
+
+def open_page(driver, url):
+    # Pacing is per signed-in account; readiness is whatever the page really needs
+    human_pacing.wait(getattr(driver, "account", None))
+    driver.get(url)
+    wait_for_document_ready(driver)
+
+
+def load_more_results(driver) -> bool:
+    # Infinite scroll loads on its own; the button only shows up on some list pages
+    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+    buttons = driver.find_elements(By.XPATH, SHOW_MORE_XPATH)
+    for button in buttons:
+        try:
+            button.click()
+            return True
+        except WebDriverException:
+            pass
+    return bool(buttons)
+
+
+def acquire_action_slot(driver, action):
+    # Raises RateLimited when the account has no slot left for this action
+    rate_scheduler.acquire(getattr(driver, "account", None), action)
+
+
+def _feed_is_reachable(driver) -> bool:
+    driver.get(LINKEDIN_FEED_URL)
+    wait_for_document_ready(driver)
+    return is_logged_in_url(driver.current_url)
+
+
+def login_with_session(driver, email, password):
+    # A pooled browser already signed in as this account needs no cookies at all
+    if getattr(driver, "account", None) == email and _feed_is_reachable(driver):
+        print("Already logged in on this browser.")
+        return True, "Login Success, Already Logged in"
+
+    cookies = session_store.load(email)
+    if cookies:
+        driver.get("https://www.linkedin.com")
+        for cookie in cookies:
+            try:
+                driver.add_cookie(cookie)
+            except WebDriverException as e:
+                print(f"Skipping cookie {cookie.get('name')}: {e}")
+        if _feed_is_reachable(driver):
+            driver.account = email
+            print("Already logged in using saved session.")
+            return True, "Login Success, Already Logged in"
+        session_store.invalidate(email)
+
+    driver.get("https://www.linkedin.com/login")
+    wait_for_element(driver, By.ID, "password")
+    try:
+        username_field = driver.find_element(By.ID, "username")
+        username_field.send_keys(email)
+    except NoSuchElementException:
+        pass  # Username field might not be found due to page structure changes
+
+    password_field = driver.find_element(By.ID, "password")
+    password_field.send_keys(password)
+    password_field.send_keys(Keys.RETURN)
+
+    # Leave the login page, then wait for the feed (2FA checkpoints get the full timeout)
+    try:
+        wait_until(
+            driver,
+            lambda d: "feed" in d.current_url,
+            timeout=LOGIN_TIMEOUT,
+        )
+    except WaitTimeout:
+        print("Login failed.")
+        return False, "Login Failed"
+
+    session_store.save(email, driver.get_cookies())
+    # Remember which account this browser is signed in as for pool affinity
+    driver.account = email
+    print("Login successful!")
+    return True, "Login Success"
 
 
 class ProfileState(str, Enum):
@@ -44,13 +243,20 @@ class ConnectionCommon:
             '//div[contains(@class, "pvs-sticky-header-profile-actions")]/div//button[@aria-label="More actions" and .//span[text()="More"]]',
         )
         button.click()
-        time.sleep(3)
+        try:
+            wait_until(self.driver, more_actions_open, timeout=3)
+        except WaitTimeout:
+            print("More actions dropdown did not open")
 
     def slide_down(self, until=None, wait=5):
         self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
         print("Document is ready")
         if until:
-            pass
+            # `wait` becomes the upper bound instead of a fixed delay
+            try:
+                wait_until(self.driver, until, timeout=wait)
+            except WaitTimeout:
+                print(f"Page not settled after {wait} seconds, continuing")
         else:
             time.sleep(wait)
 
@@ -81,117 +287,96 @@ class ConnectionCommon:
         return ProfileState.NOT_CONNECTED
 
     def login_linkedin(self, email, password):
-        self.driver.get("https://www.linkedin.com/login")
-        time.sleep(2)
-
-        # Enter the username
-        username_field = self.driver.find_element(By.ID, "username")
-        username_field.send_keys(email)
-
-        # Enter the password
-        password_field = self.driver.find_element(By.ID, "password")
-        password_field.send_keys(password)
-
-        # Submit the form
-        password_field.send_keys(Keys.RETURN)
-        time.sleep(5)
+        return login_with_session(self.driver, email, password)
 
 
 class ConnectionSync:
-    def __init__(self, message=None):
-        chrome_options = Options()
-        # Uncomment for headless mode
-        # chrome_options.add_argument("--headless")
-        self.driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()), options=chrome_options
-        )
+    def __init__(
+        self,
+        message=None,
+        account=None,
+        profile=DEFAULT_PROFILE,
+        extraction_mode=DEFAULT_EXTRACTION_MODE,
+    ):
+        self.driver = driver_pool.checkout(account=account, profile=profile)
         self.message = message
+        self.extraction_mode = extraction_mode
 
     def login_linkedin(self, email, password):
-        self.driver.get("https://www.linkedin.com/login")
-        time.sleep(2)
-
-        # Enter the username
-        username_field = self.driver.find_element(By.ID, "username")
-        username_field.send_keys(email)
-
-        # Enter the password
-        password_field = self.driver.find_element(By.ID, "password")
-        password_field.send_keys(password)
-
-        # Submit the form
-        password_field.send_keys(Keys.RETURN)
-        time.sleep(5)
-
-    def login(self, email, password, cookies_location):
-        # Create cookies directory if it doesn't exist
-        if not os.path.exists(cookies_location):
-            os.makedirs(cookies_location, exist_ok=True)
-
-        # Path to save and load cookies
-        cookies_file_path = f"{cookies_location}/{email}_linkedin_cookies.pkl"
-
-        # Load cookies if available
-        if os.path.exists(cookies_file_path):
-            self.driver.get("https://www.linkedin.com")
-            with open(cookies_file_path, "rb") as cookies_file:
-                cookies = pickle.load(cookies_file)
-                for cookie in cookies:
-                    self.driver.add_cookie(cookie)
-            self.driver.refresh()
-
-        # Check if already logged in by loading the LinkedIn feed page
-        self.driver.get("https://www.linkedin.com/feed")
-        time.sleep(5)
+        return login_with_session(self.driver, email, password)
 
-        # If not logged in, perform login
-        if (
-            "session_redirect" in self.driver.current_url
-            or "uas/login?session_redirect" in self.driver.current_url
-        ):
-            try:
-                username_field = self.driver.find_element(By.ID, "username")
-                username_field.send_keys(email)
-            except Exception:
-                pass  # Username field might not be found due to page structure changes
-
-            password_field = self.driver.find_element(By.ID, "password")
-            password_field.send_keys(password)
-
-            # Submit the form
-            password_field.send_keys(Keys.RETURN)
-
-            # Wait for login to complete and check for 2FA flow
-            time.sleep(20)
-
-            # Save cookies for future use
-            cookies = self.driver.get_cookies()
-            with open(cookies_file_path, "wb") as cookies_file:
-                pickle.dump(cookies, cookies_file)
-
-            if "feed" in self.driver.current_url:
-                print("Login successful!")
-                return True, "Login Success"
-            else:
-                print("Login failed.")
-                return False, "Login Failed"
-        else:
-            print("Already logged in using saved cookies.")
-            return True, "Login Success, Already Logged in"
+    def login(self, email, password, cookies_location=None):
+        # Cookies live in the shared session store; cookies_location is kept for old callers
+        return login_with_session(self.driver, email, password)
 
     def _extract_li_from_div(
-        self, html_content: str, target_class: str, function
+        self, html_content: str, target_class: str, function, backend=None
     ) -> List[Dict[str, str]]:
-        soup = BeautifulSoup(html_content, "html.parser")
-        divs = soup.find_all("div", class_=target_class)
-        li_elements = []
-        for div in divs:
-            li_elements.extend(div.find_all("li"))
+        li_elements = find_list_items(html_content, target_class, backend)
         contacts = []
         for li_element in li_elements:
             contacts.append(function(li_element))
         return contacts
 
+    def _extract_cards(
+        self, target_class: str, kind: str, cursor: int = 0
+    ) -> Tuple[List[Dict[str, str]], int]:
+        # Only list items from `cursor` onwards cross the WebDriver wire
+        selector = f"div.{target_class} li"
+        if self.extraction_mode == EXTRACTION_JSON:
+            records = self.driver.execute_script(
+                LIST_RECORDS_SCRIPT, selector, cursor, CARD_FIELDS[kind]
+            )
+            from_record = {
+                "connections": self._connection_from_record,
+                "following": self._following_from_record,
+                "followers": self._follower_from_record,
+            }[kind]
+            contacts = [from_record(record) for record in records]
+            return contacts, cursor + len(records)
+
+        function = {
+            "connections": self._extract_connection_info,
+            "following": self._extract_following_info,
+            "followers": self._extract_follower_info,
+        }[kind]
+        items = self.driver.execute_script(NEW_LIST_ITEMS_SCRIPT, selector, cursor)
+        contacts = []
+        for item_html in items:
+            li_element = parse_list_item(item_html)
+            if li_element is None:
+                continue
+            try:
+                contacts.append(function(li_element))
+            except (AttributeError, KeyError, TypeError) as e:
+                # A missing element surfaces as find() returning None
+                raise IncompleteCard(f"{kind} card could not be parsed: {e}") from e
+        return contacts, cursor + len(items)
+
+    # Record builders for the JSON mode; each returns what the matching _extract_*_info returns
+
+    def _connection_from_record(self, record):
+        _require_fields(record, "connections", ("name", "profile_link"))
+        return {
+            "name": record["name"],
+            "profile_link": f"https://www.linkedin.com{record['profile_link']}",
+        }
+
+    def _following_from_record(self, record):
+        _require_fields(record, "following", ("name", "occupation", "profile_link"))
+        return {
+            "name": record["name"],
+            "occupation": record["occupation"],
+            "profile_link": record["profile_link"],
+            "avatar": record["avatar_url"],
+        }
+
+    def _follower_from_record(self, record):
+        return {
+            "name": record["name"] or "Name not found",
+            "occupation": record["occupation"] or "Occupation not found",
+        }
+
     def _extract_connection_info(self, li_element) -> Dict[str, str]:
         name = li_element.find("span", class_="mn-connection-card__name").get_text(
             strip=True
@@ -200,31 +385,56 @@ class ConnectionSync:
         full_profile_link = f"https://www.linkedin.com{profile_link}"
         return {"name": name, "profile_link": full_profile_link}
 
-    def download(self, username: str, password: str) -> List[Dict[str, str]]:
+    def _open_list_page(self, url):
+        self.driver.get(url)
+        wait_for_document_ready(self.driver)
+        self.minimize_messaging_if_available()
+        try:
+            wait_for_element(self.driver, By.CSS_SELECTOR, f".{LIST_CONTAINER_CLASS}")
+        except WaitTimeout as e:
+            print(e)
+
+    def _paginator(self, max_pages=None, max_items=None, on_progress=print_progress):
+        limits = {}
+        if max_pages is not None:
+            limits["max_pages"] = max_pages
+        if max_items is not None:
+            limits["max_items"] = max_items
+        return Paginator(
+            self.driver,
+            f"div.{LIST_CONTAINER_CLASS} li",
+            load_more_results,
+            on_progress=on_progress,
+            **limits,
+        )
+
+    def download(
+        self,
+        username: str,
+        password: str,
+        max_pages=None,
+        max_items=None,
+        on_progress=print_progress,
+    ) -> List[Dict[str, str]]:
         # Call the login function with the same driver
-        self.login_linkedin(username, password)
-        self.driver.get(
+        logged_in, message = self.login_linkedin(username, password)
+        if not logged_in:
+            # Scraping signed out would report an empty network as a successful sync
+            raise RuntimeError(message)
+        self._open_list_page(
             "https://www.linkedin.com/mynetwork/invite-connect/connections/"
         )
-        time.sleep(5)
-        self.minimize_messaging_if_available()
 
         all_contacts = []
         seen_profiles = set()  # Keep track of seen profile links
-        last_height = 0
-        new_height = self.driver.execute_script("return document.body.scrollHeight")
-
-        while last_height != new_height:
-            last_height = new_height
-            self.driver.execute_script(
-                "window.scrollTo(0, document.body.scrollHeight);"
-            )
-            time.sleep(5)  # Adjust this time if necessary
-
-            new_contacts = self._extract_li_from_div(
-                self.driver.page_source,
-                target_class="scaffold-finite-scroll__content",
-                function=self._extract_connection_info,
+        cursor = 0  # Number of list items already parsed
+
+        paginator = self._paginator(max_pages, max_items, on_progress)
+        for _ in paginator:
+            new_contacts, cursor = self._extract_cards(
+                target_class=LIST_CONTAINER_CLASS,
+                kind="connections",
+                cursor=cursor,
             )
 
             # Only add unique contacts
@@ -233,20 +443,10 @@ class ConnectionSync:
                     all_contacts.append(contact)
                     seen_profiles.add(contact["profile_link"])
 
-            new_height = self.driver.execute_script("return document.body.scrollHeight")
-
-            # Check for "Show more" button and click if available
-            try:
-                button = self.driver.find_element(
-                    By.XPATH,
-                    "//button[contains(@class, 'artdeco-button') and .//span[text()='Show more results']]",
-                )
-                button.click()
-                time.sleep(5)  # Wait for more results to load
-            except Exception as e:
-                print(f"No more 'Show more results' button or error: {e}")
-
-        print(f"Found {len(all_contacts)} unique connections")
+        print(
+            f"Found {len(all_contacts)} unique connections "
+            f"({paginator.stats.stop_reason}, {paginator.stats.items_per_second:.1f} items/s)"
+        )
         return all_contacts
 
     def minimize_messaging_if_available(self):
@@ -272,69 +472,39 @@ class ConnectionSync:
         # TODO: The link is not directly mapping to the actual url, probably we require another service to
         # normalize it. Like a seperate instance later to make the linkage correct. Else we can expect duplicate records
         profile_link = li_element.find("a", class_="app-aware-link")["href"]
-        filename = profile_link.strip("/").replace("/", "_") + ".jpg"
 
-        # Create data folder if it doesn't exist
-        if not os.path.exists("data"):
-            os.makedirs("data")
-
-        # Extract image URL\
-        image_link = None
+        # Extract image URL
+        img_url = None
         try:
-            img_tag = li_element.find("img", class_="presence-entity__image")
-            img_url = img_tag["src"]
-            # Check if the image is a placeholder or an actual image
-            if img_url.startswith("data:image/"):  # Placeholder image
-                print(f"Skipping placeholder image for {profile_link}")
-            else:
-                # Download the image and save it with the profile link as filename
-                img_data = requests.get(img_url).content
-                with open(os.path.join("data", filename), "wb") as handler:
-                    handler.write(img_data)
-                    print(
-                        f"Image downloaded for {profile_link} and saved as {filename}"
-                    )
-                image_link = filename
+            img_url = li_element.find("img", class_="presence-entity__image")["src"]
         except Exception:
             pass
 
+        # The image URL is swapped for the stored file by _attach_avatars once parsing is done
         return {
             "name": name,
             "occupation": occupation,
             "profile_link": profile_link,
-            "avatar": image_link,
+            "avatar": img_url,
         }
 
-    def get_following(self):
+    def _attach_avatars(self, contacts):
+        stored = avatar_fetcher.fetch_all(contact["avatar"] for contact in contacts)
+        for contact in contacts:
+            contact["avatar"] = stored.get(contact["avatar"])
+        return contacts
+
+    def get_following(self, max_pages=None, max_items=None, on_progress=print_progress):
         # self.login_linkedin(username, password)
-        self.driver.get(
+        self._open_list_page(
             "https://www.linkedin.com/mynetwork/network-manager/people-follow/following/"
         )
-        page_state = self.driver.execute_script("return document.readyState;")
-        while page_state != "complete":
-            page_state = self.driver.execute_script("return document.readyState;")
-        time.sleep(5)
-        self.minimize_messaging_if_available()
-        # loader_xpath = "//div[contains(@class, 'artdeco-loader') and .//div[text()='Loading more results']]"
-        button_locator = "//button[contains(@class, 'artdeco-button') and .//span[text()='Show more results']]"
-        time.sleep(5)
-        while "Show more results" in self.driver.page_source:
-            self.driver.execute_script(
-                "window.scrollTo(0, document.body.scrollHeight);"
-            )
-            try:
-                button = self.driver.find_element(By.XPATH, button_locator)
-                if button:
-                    button.click()
-            except Exception:
-                pass
-            time.sleep(5)
-        contacts = self._extract_li_from_div(
-            self.driver.page_source,
-            target_class="scaffold-finite-scroll__content",
-            function=self._extract_following_info,
+        stats = self._paginator(max_pages, max_items, on_progress).run()
+        contacts, _ = self._extract_cards(
+            target_class=LIST_CONTAINER_CLASS, kind="following"
         )
-        print(f"Found {len(contacts)}")
+        self._attach_avatars(contacts)
+        print(f"Found {len(contacts)} ({stats.stop_reason})")
         return contacts
 
     def _extract_follower_info(self, li_element):
@@ -366,40 +536,16 @@ class ConnectionSync:
             # "avatar": image_link
         }
 
-    def get_follower(self):
+    def get_follower(self, max_pages=None, max_items=None, on_progress=print_progress):
         # self.login_linkedin(username, password)
-        print("here it came")
-        self.driver.get(
+        self._open_list_page(
             "https://www.linkedin.com/mynetwork/network-manager/people-follow/followers/"
         )
-        print("hi")
-        page_state = self.driver.execute_script("return document.readyState;")
-        while page_state != "complete":
-            page_state = self.driver.execute_script("return document.readyState;")
-        time.sleep(5)
-        self.minimize_messaging_if_available()
-        # loader_xpath = "//div[contains(@class, 'artdeco-loader') and .//div[text()='Loading more results']]"
-        button_locator = "//button[contains(@class, 'artdeco-button') and .//span[text()='Show more results']]"
-        time.sleep(5)
-        while "Show more results" in self.driver.page_source:
-            self.driver.execute_script(
-                "window.scrollTo(0, document.body.scrollHeight);"
-            )
-            try:
-                button = self.driver.find_element(By.XPATH, button_locator)
-                if button:
-                    button.click()
-            except Exception:
-                pass
-            time.sleep(5)
-        contacts = self._extract_li_from_div(
-            self.driver.page_source,
-            target_class="scaffold-finite-scroll__content",
-            function=self._extract_follower_info,
+        stats = self._paginator(max_pages, max_items, on_progress).run()
+        contacts, _ = self._extract_cards(
+            target_class=LIST_CONTAINER_CLASS, kind="followers"
         )
-        # print(contacts)
-        # print("here it came 3")
-        print(f"Found {len(contacts)}")
+        print(f"Found {len(contacts)} ({stats.stop_reason})")
         return contacts
 
     def slide_down(self, until=None, wait=8):
@@ -407,7 +553,10 @@ class ConnectionSync:
         self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
         print("Page scrolled down")
         if until:
-            pass
+            try:
+                wait_until(self.driver, until, timeout=wait)
+            except WaitTimeout:
+                print(f"Page not settled after {wait} seconds, continuing")
         else:
             time.sleep(wait)  # Wait for posts to load before proceeding
 
@@ -427,14 +576,18 @@ class ConnectionSync:
                         )
                     )
                 )
+                acquire_action_slot(self.driver, ACTION_LIKE)
                 like_button.click()  # Click the Like button
                 print("Post liked successfully!")
                 time.sleep(2)  # Delay to avoid spamming actions
 
+            except RateLimited as e:
+                print(e)
+                return
             except Exception as e:
                 print(f"No more likeable posts found or an error occurred: {e}")
                 # Scroll down to load more posts and retry
-                self.slide_down(self.driver)
+                self.slide_down()
                 time.sleep(7)
                 return  # Allow time for new posts to load
 
@@ -453,6 +606,7 @@ class ConnectionSync:
                     )
                 )
             )
+            acquire_action_slot(self.driver, ACTION_MESSAGE)
             message_button.click()
             time.sleep(2)
 
@@ -477,6 +631,8 @@ class ConnectionSync:
             send_button.click()
             print("Message sent successfully!")
 
+        except RateLimited:
+            raise
         except Exception:
             print("Message button not found or unable to send message.")
 
@@ -510,17 +666,22 @@ class ConnectionSync:
         # #print(profile_data)
         return profile_data
 
+    def close(self):
+        driver_pool.checkin(self.driver)
+
 
 class FollowSync(ConnectionSync):
-    def __init__(self, email: str, password: str):
-        chrome_options = Options()
-        # Uncomment for headless mode
-        # chrome_options.add_argument("--headless")
-        self.driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()), options=chrome_options
-        )
+    def __init__(
+        self,
+        email: str,
+        password: str,
+        profile=DEFAULT_PROFILE,
+        extraction_mode=DEFAULT_EXTRACTION_MODE,
+    ):
+        self.driver = driver_pool.checkout(account=email, profile=profile)
         self.email = email
         self.password = password
+        self.extraction_mode = extraction_mode
 
     def click_more_action(self):
         button = self.driver.find_element(
@@ -528,7 +689,10 @@ class FollowSync(ConnectionSync):
             '//div[contains(@class, "pvs-sticky-header-profile-actions")]/div//button[@aria-label="More actions" and .//span[text()="More"]]',
         )
         button.click()
-        time.sleep(3)
+        try:
+            wait_until(self.driver, more_actions_open, timeout=3)
+        except WaitTimeout:
+            print("More actions dropdown did not open")
 
     def get_status(self):
         if "Remove Connection" in self.driver.page_source:
@@ -559,8 +723,11 @@ class FollowSync(ConnectionSync):
             return False
 
     def get_and_follow_company_profiles(self, linkedin_experience_url):
-        self.driver.get(linkedin_experience_url)
-        time.sleep(5)  # Wait for the page to load
+        open_page(self.driver, linkedin_experience_url)
+        try:
+            wait_for_element(self.driver, By.CSS_SELECTOR, 'a[href*="/company/"]', timeout=10)
+        except WaitTimeout:
+            print(f"No company links found on {linkedin_experience_url}")
 
         # Find company profile links
         company_elements = self.driver.find_elements(
@@ -570,46 +737,44 @@ class FollowSync(ConnectionSync):
 
         # Follow each company profile
         for profile_url in company_profiles:
-            self.driver.get(profile_url)
-            time.sleep(5)  # Wait for the page to load
+            open_page(self.driver, profile_url)
 
             try:
                 # Find and click the "Follow" button
-                follow_button = self.driver.find_element(
+                follow_button = wait_for_element(
+                    self.driver,
                     By.XPATH,
                     '//button[contains(@aria-label, "Follow") and @type="button"]',
+                    timeout=10,
                 )
                 if follow_button.text.lower() == "follow":
+                    acquire_action_slot(self.driver, ACTION_FOLLOW)
                     follow_button.click()
                     print(f"Followed {profile_url}")
                 else:
                     print(f"Already following {profile_url}")
-            except NoSuchElementException as e:
+            except (NoSuchElementException, WaitTimeout) as e:
                 print(f"Could not follow {profile_url}: {e}")
-
-            time.sleep(5)
+            except RateLimited as e:
+                # The profile follow already went through; companies can wait
+                print(e)
+                break
 
     def send(self, profile_url: str):
         self.profile_url = profile_url
-        self.driver.get(profile_url)
-        time.sleep(5)
         print("Waiting for document to be ready")
-        page_state = self.driver.execute_script("return document.readyState;")
-        while page_state != "complete":
-            page_state = self.driver.execute_script("return document.readyState;")
-        self.slide_down()
-        print("Document is ready")
-        time.sleep(5)
+        open_page(self.driver, self.profile_url)
+        self.slide_down(until=profile_actions_ready)
         self.minimize_messaging_if_available()
 
         connection_status = self.get_status()
         if connection_status in [ProfileState.PENDING]:
             return connection_status
 
+        acquire_action_slot(self.driver, ACTION_FOLLOW)
         direct_follow_available = self._follow_from_button()
         if not direct_follow_available:
             self._follow_from_drop_down()
-            time.sleep(5)
 
         # Get the URL for the experience section and follow the companies
         experience_url = f"{self.profile_url}/details/experience"
@@ -618,18 +783,13 @@ class FollowSync(ConnectionSync):
         return True
 
     def close(self):
-        self.driver.quit()
+        driver_pool.checkin(self.driver)
 
 
 class FollowRequest(ConnectionCommon):
 
-    def __init__(self, email: str, password: str):
-        chrome_options = Options()
-        # Uncomment for headless mode
-        # chrome_options.add_argument("--headless")
-        self.driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()), options=chrome_options
-        )
+    def __init__(self, email: str, password: str, profile=DEFAULT_PROFILE):
+        self.driver = driver_pool.checkout(account=email, profile=profile)
         self.email = email
         self.password = password
 
@@ -656,43 +816,33 @@ class FollowRequest(ConnectionCommon):
 
     def send(self, profile_url=None):
         self.profile_url = profile_url
-        self.driver.get(self.profile_url)
-        time.sleep(5)
         print("Waiting for document to be ready")
-        page_state = self.driver.execute_script("return document.readyState;")
-        while page_state != "complete":
-            page_state = self.driver.execute_script("return document.readyState;")
-        self.slide_down()
-        print("Document is ready")
-        time.sleep(5)
+        open_page(self.driver, self.profile_url)
+        self.slide_down(until=profile_actions_ready)
         self.minimize_messaging_if_available()
 
         connection_status = self.get_status()
         if connection_status in [ProfileState.PENDING]:
             return connection_status
 
+        acquire_action_slot(self.driver, ACTION_FOLLOW)
         direct_follow_available = self._follow_from_button()
         if not direct_follow_available:
             self._follow_from_drop_down()
-            time.sleep(5)
 
         return True
 
     def close(self):
-        self.driver.quit()
+        driver_pool.checkin(self.driver)
 
 
 class ConnectionRequest(ConnectionCommon):
 
-    def __init__(self, email: str, password: str):
-        chrome_options = Options()
-        # Uncomment for headless mode
-        # chrome_options.add_argument("--headless")
-        self.driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()), options=chrome_options
-        )
+    def __init__(self, email: str, password: str, profile=DEFAULT_PROFILE, message=None):
+        self.driver = driver_pool.checkout(account=email, profile=profile)
         self.email = email
         self.password = password
+        self.message = message
 
     def _connect_from_drop_down(self):
         self.click_more_action()
@@ -715,15 +865,9 @@ class ConnectionRequest(ConnectionCommon):
 
     def send(self, profile_url=None):
         self.profile_url = profile_url
-        self.driver.get(self.profile_url)
-        time.sleep(5)
         print("Waiting for document to be ready")
-        page_state = self.driver.execute_script("return document.readyState;")
-        while page_state != "complete":
-            page_state = self.driver.execute_script("return document.readyState;")
-        self.slide_down()
-        print("Document is ready")
-        time.sleep(5)
+        open_page(self.driver, self.profile_url)
+        self.slide_down(until=profile_actions_ready)
         # Minimize Messaging
         self.minimize_messaging_if_available()
 
@@ -731,10 +875,14 @@ class ConnectionRequest(ConnectionCommon):
         if connection_status in [ProfileState.CONNECTED, ProfileState.PENDING]:
             return connection_status
         # Check if Connect is available in header
+        acquire_action_slot(self.driver, ACTION_CONNECT)
         direct_connect_available = self._connect_from_button()
         if not direct_connect_available:
             self._connect_from_drop_down()
-        time.sleep(2)
+        try:
+            wait_until(self.driver, invitation_modal_open, timeout=CONNECT_MODAL_TIMEOUT)
+        except WaitTimeout:
+            pass
         if "Add a note to your invitation" in self.driver.page_source:
             if (
                 "To verify this member knows you, please enter their email to connect"
@@ -754,18 +902,13 @@ class ConnectionRequest(ConnectionCommon):
         return True
 
     def close(self):
-        self.driver.quit()
+        driver_pool.checkin(self.driver)
 
 
 class SendingConnectionRequest(ConnectionCommon):
 
-    def __init__(self, profile_url, message=None):
-        chrome_options = Options()
-        # Uncomment for headless mode
-        # chrome_options.add_argument("--headless")
-        self.driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()), options=chrome_options
-        )
+    def __init__(self, profile_url, message=None, profile=DEFAULT_PROFILE, account=None):
+        self.driver = driver_pool.checkout(account=account, profile=profile)
         self.profile_url = profile_url
         self.message = message
 
@@ -788,87 +931,33 @@ class SendingConnectionRequest(ConnectionCommon):
         except NoSuchElementException:
             return False
 
-    def login(self, email, password, cookies_location):
-        # Create cookies directory if it doesn't exist
-        if not os.path.exists(cookies_location):
-            os.makedirs(cookies_location, exist_ok=True)
-
-        # Path to save and load cookies
-        cookies_file_path = f"{cookies_location}/{email}_linkedin_cookies.pkl"
-
-        # Load cookies if available
-        if os.path.exists(cookies_file_path):
-            self.driver.get("https://www.linkedin.com")
-            with open(cookies_file_path, "rb") as cookies_file:
-                cookies = pickle.load(cookies_file)
-                for cookie in cookies:
-                    self.driver.add_cookie(cookie)
-            self.driver.refresh()
-
-        # Check if already logged in by loading the LinkedIn feed page
-        self.driver.get("https://www.linkedin.com/feed")
-        time.sleep(5)
-
-        # If not logged in, perform login
-        if (
-            "session_redirect" in self.driver.current_url
-            or "uas/login?session_redirect" in self.driver.current_url
-        ):
-            try:
-                username_field = self.driver.find_element(By.ID, "username")
-                username_field.send_keys(email)
-            except Exception:
-                pass  # Username field might not be found due to page structure changes
-
-            password_field = self.driver.find_element(By.ID, "password")
-            password_field.send_keys(password)
-
-            # Submit the form
-            password_field.send_keys(Keys.RETURN)
-
-            # Wait for login to complete and check for 2FA flow
-            time.sleep(20)
-
-            # Save cookies for future use
-            cookies = self.driver.get_cookies()
-            with open(cookies_file_path, "wb") as cookies_file:
-                pickle.dump(cookies, cookies_file)
-
-            if "feed" in self.driver.current_url:
-                print("Login successful!")
-                return True, "Login Success"
-            else:
-                print("Login failed.")
-                return False, "Login Failed"
-        else:
-            print("Already logged in using saved cookies.")
-            return True, "Login Success, Already Logged in"
+    def login(self, email, password, cookies_location=None):
+        # Cookies live in the shared session store; cookies_location is kept for old callers
+        return login_with_session(self.driver, email, password)
 
     def send(self):
         # Navigate to the LinkedIn profile URL
-        self.driver.get(self.profile_url)
-        time.sleep(5)
         print("Waiting for document to be ready")
-        page_state = self.driver.execute_script("return document.readyState;")
-        while page_state != "complete":
-            page_state = self.driver.execute_script("return document.readyState;")
-        self.slide_down()
-        print("Document is ready")
-        time.sleep(5)
+        open_page(self.driver, self.profile_url)
+        self.slide_down(until=profile_actions_ready)
 
         # Minimize Messaging
         self.minimize_messaging_if_available()
 
         # Try sending a connection request
         connection_status = self.get_status()
-        if connection_status in ["CONNECTED", "PENDING"]:
+        if connection_status in [ProfileState.CONNECTED, ProfileState.PENDING]:
             return connection_status
 
+        acquire_action_slot(self.driver, ACTION_CONNECT)
         direct_connect_available = self._connect_from_button()
         if not direct_connect_available:
             self._connect_from_drop_down()
 
-        time.sleep(2)
+        try:
+            wait_until(self.driver, invitation_modal_open, timeout=CONNECT_MODAL_TIMEOUT)
+        except WaitTimeout:
+            pass
         if "Add a note to your invitation" in self.driver.page_source:
             if self.message:
                 xpath_locator = "//button[@aria-label='Add a note']"
@@ -882,6 +971,9 @@ class SendingConnectionRequest(ConnectionCommon):
                 button.click()
         return True
 
+    def close(self):
+        driver_pool.checkin(self.driver)
+
 
 class FollowUserCompany(ConnectionCommon):
     def __init__(self, driver, profile_url, message=None, email=None):
@@ -912,25 +1004,19 @@ class FollowUserCompany(ConnectionCommon):
             return False
  
     def send(self):
-        self.driver.get(self.profile_url)
-        time.sleep(5)
         print("Waiting for document to be ready")
-        page_state = self.driver.execute_script('return document.readyState;')
-        while page_state != 'complete':
-            page_state = self.driver.execute_script('return document.readyState;')
-        self.slide_down()
-        print("Document is ready")
-        time.sleep(5)
+        open_page(self.driver, self.profile_url)
+        self.slide_down(until=profile_actions_ready)
         self.minimize_messaging_if_available()
  
         connection_status = self.get_status()
         if connection_status in [ProfileState.PENDING]:
             return connection_status
        
+        acquire_action_slot(self.driver, ACTION_FOLLOW)
         direct_follow_available = self._follow_from_button()
         if not direct_follow_available:
             self._follow_from_drop_down()
-            time.sleep(5)
  
         # After following, navigate to the experience page
         self.navigate_to_experience_section()
@@ -940,12 +1026,13 @@ class FollowUserCompany(ConnectionCommon):
     def navigate_to_experience_section(self):
         # Reload the profile URL with the /details/experience path to navigate to the experience page
         experience_url = f"{self.profile_url}/details/experience"
-        self.driver.get(experience_url)
-        time.sleep(5)  # Wait for the page to load
+        open_page(self.driver, experience_url)
+        try:
+            wait_for_element(self.driver, By.CSS_SELECTOR, 'a[href*="/company/"]', timeout=10)
+        except WaitTimeout:
+            print(f"No company links found on {experience_url}")
  
         print("Navigating to experience section")
-   # Scroll down if necessary
-        time.sleep(3)
  
         # Target the top container of the experience section and search for the most recent experience
         self.target_top_experience_container()
@@ -958,21 +1045,22 @@ class FollowUserCompany(ConnectionCommon):
     
             # Follow each company profile
             for profile_url in company_profiles:
-                self.driver.get(profile_url)
-                time.sleep(5)  # Wait for the page to load
+                open_page(self.driver, profile_url)
     
                 try:
                     # Find and click the "Follow" button
-                    follow_button = self.driver.find_element(By.XPATH, '//button[contains(@class, "follow")]')
+                    follow_button = wait_for_element(self.driver, By.XPATH, '//button[contains(@class, "follow")]', timeout=10)
                     if follow_button.text.lower() == 'follow':
+                        acquire_action_slot(self.driver, ACTION_FOLLOW)
                         follow_button.click()
                         print(f'Followed {profile_url}')
                     else:
                         print(f'Already following {profile_url}')
+                except RateLimited as e:
+                    print(e)
+                    break
                 except Exception as e:
                     print(f'Could not follow {profile_url}: {e}')
-    
-                time.sleep(5)  
             
  
         except NoSuchElementException as e:
@@ -1002,45 +1090,299 @@ class FollowUserCompany(ConnectionCommon):
 
 
 
-# Background task to send LinkedIn connection requests sequentially
-async def send_linkedin_connections_sequentially():
-    while profile_queue:
-        profile = profile_queue.pop(0)
-        profile_url = profile["profile_url"]
+# Job types handled by the LinkedIn queue worker
+JOB_CONNECT = "connect"
+JOB_FOLLOW = "follow"
+JOB_CSV_CONNECT = "csv_connect"
+JOB_FOLLOW_PROFILE = "follow_profile"
+JOB_ENGAGE = "engage"
+JOB_FETCH_METRICS = "fetch_metrics"
+
+QUEUE_IDLE_POLL = 5
+
+# The CSV upload flow signs in with this fixed account
+CSV_LINKEDIN_EMAIL = "xxxx"
+CSV_LINKEDIN_PASSWORD = "yyyy"
+
+# Action whose rate limit gates each job type; metrics syncs only read pages
+JOB_ACTIONS = {
+    JOB_CONNECT: ACTION_CONNECT,
+    JOB_FOLLOW: ACTION_FOLLOW,
+    JOB_CSV_CONNECT: ACTION_CONNECT,
+    JOB_FOLLOW_PROFILE: ACTION_FOLLOW,
+    JOB_ENGAGE: ACTION_LIKE,
+}
+
+
+def _result_label(result) -> str:
+    if isinstance(result, Enum):
+        return result.value
+    if result is True:
+        return "sent"
+    if result is None:
+        return "no_action"
+    return str(result)
+
+
+def _linkedin_password(account: str) -> str:
+    profile = get_user_profilecollection().find_one(
+        {"linkedin_profile.username": account}, {"linkedin_profile.password": 1}
+    )
+    password = (profile or {}).get("linkedin_profile", {}).get("password")
+    if not password:
+        raise ValueError(f"No LinkedIn credentials stored for {account}")
+    return password
+
+
+def _login(sync, account):
+    logged_in, message = sync.login_linkedin(account, _linkedin_password(account))
+    if not logged_in:
+        raise RuntimeError(message)
+
 
-        # Call the send_linkedin_connection function with ConnectionRequest class
-        send_linkedin_connection(profile_url)
+def sync_linkedin_metrics(owner, account, report_progress=None):
+    """Sync connections into contacts and store connection/following/follower counts."""
+    def on_progress(stage):
+        def report(stats):
+            print_progress(stats)
+            if report_progress:
+                report_progress({"stage": stage, **stats.as_dict()})
 
-        await asyncio.sleep(3)  # 1 minutes delay between requests (adjust as needed)
+        return report
+
+    sync = ConnectionSync(account=account)
+    try:
+        contacts = sync.download(
+            account, _linkedin_password(account), on_progress=on_progress("connections")
+        )
+        contact_counts = contact_store.upsert(owner, contacts)
+        following = sync.get_following(on_progress=on_progress("following"))
+        followers = sync.get_follower(on_progress=on_progress("followers"))
+    finally:
+        sync.close()
+
+    metrics = {
+        "connections": len(contacts),
+        "following": len(following),
+        "followers": len(followers),
+    }
+    get_user_profilecollection().update_one(
+        {"email": owner},
+        {"$set": {f"linkedin_profile.metrics.{name}": count for name, count in metrics.items()}},
+    )
+    invalidate_user_profile(owner)
+    return {"metrics": metrics, "contacts": contact_counts}
+
+
+def engage_with_profile(owner, account, profile_link, message_text):
+    """Like the profile's posts, message it and store its headline."""
+    sync = ConnectionSync(account=account)
+    try:
+        _login(sync, account)
+        sync.like_all_posts(profile_link)
+        sync.send_message(profile_link, message_text)
+        profile_info = sync.extract_info(profile_link)
+    finally:
+        sync.close()
+
+    # Scoped to the owner like synced contacts, so it never touches another user's copy
+    contact_store.upsert(
+        owner, [{"profile_link": profile_link, "headline": profile_info.get("headline")}]
+    )
+    return profile_info
+
+
+def follow_profile_and_companies(account, profile_url):
+    sync = FollowSync(email=account, password=None)
+    try:
+        _login(sync, account)
+        return _result_label(sync.send(profile_url))
+    finally:
+        sync.close()
+
+
+class QueueWorker:
+    def __init__(self, queue=linkedin_queue, worker_id=None, shard=None):
+        self.queue = queue
+        self.worker_id = worker_id
+        # (index, count) share of accounts this worker leases jobs for
+        self.shard = shard
+        # Signed-in browsers per (job type, account), least recently used first. Kept below
+        # the pool size so jobs that check out their own browser never wait on this worker
+        self._syncs = OrderedDict()
+        self.max_syncs = max(driver_pool.size - 1, 0)
+
+    def _trim_syncs(self, limit):
+        while len(self._syncs) > limit:
+            _, sync = self._syncs.popitem(last=False)
+            sync.close()
+
+    def _sync_for(self, job_type, account):
+        key = (job_type, account)
+        if key in self._syncs:
+            self._syncs.move_to_end(key)
+        else:
+            # Hand a browser back before checking out another one
+            self._trim_syncs(max(self.max_syncs - 1, 0))
+            sync_class = FollowRequest if job_type == JOB_FOLLOW else ConnectionRequest
+            sync = sync_class(email=account, password=None, profile=BULK_PROFILE)
+            try:
+                _login(sync, account)
+            except Exception:
+                sync.close()
+                raise
+            self._syncs[key] = sync
+        return self._syncs[key]
+
+    def _drop_sync(self, job_type, account):
+        sync = self._syncs.pop((job_type, account), None)
+        if sync:
+            sync.close()
+
+    def run_job(self, job):
+        payload = job["payload"]
+        if job["type"] == JOB_CSV_CONNECT:
+            return send_linkedin_connection(payload["profile_url"])
+        if job["type"] == JOB_FETCH_METRICS:
+            return sync_linkedin_metrics(
+                payload["owner"],
+                payload["account"],
+                lambda progress: self.queue.report_progress(job, progress),
+            )
+        if job["type"] == JOB_ENGAGE:
+            return engage_with_profile(
+                payload["owner"], payload["account"], payload["profile_url"], payload["message"]
+            )
+        if job["type"] == JOB_FOLLOW_PROFILE:
+            return follow_profile_and_companies(payload["account"], payload["profile_url"])
+        if job["type"] in (JOB_CONNECT, JOB_FOLLOW):
+            sync = self._sync_for(job["type"], payload["account"])
+            try:
+                return sync.send(payload["profile_url"])
+            except Exception:
+                # The browser may be in a bad state; start fresh on the retry
+                self._drop_sync(job["type"], payload["account"])
+                raise
+        raise ValueError(f"Unknown job type: {job['type']}")
+
+    def run_once(self) -> bool:
+        job = self.queue.lease(self.worker_id, self.shard)
+        if job is None:
+            return False
+        run_id = job.get("batch_id")
+        profile_url = job["payload"].get("profile_url")
+        if run_id and batch_runs.is_done(run_id, profile_url):
+            # Finished before a crash or restart; don't load the profile again
+            self.queue.complete(job, "already_done")
+            return True
+        account = job["payload"].get("account", CSV_LINKEDIN_EMAIL)
+        action = JOB_ACTIONS.get(job["type"])
+        wait = rate_scheduler.wait_time(account, action) if action else 0
+        if wait > 0:
+            # Park the job until its account has a slot and move on to other accounts
+            self.queue.defer(job, wait)
+            return True
+        try:
+            result = self.run_job(job)
+        except RateLimited as e:
+            self.queue.defer(job, e.retry_after)
+        except Exception as e:
+            status = self.queue.fail(job, e)
+            print(f"Job {job['_id']} failed ({status or 'lease lost'}): {e}")
+            if run_id and status == JobStatus.DEAD:
+                batch_runs.checkpoint(run_id, profile_url, CheckpointStatus.FAILED, str(e))
+        else:
+            if run_id:
+                result = _result_label(result)
+                batch_runs.checkpoint(run_id, profile_url, CheckpointStatus.DONE, result)
+            elif not isinstance(result, dict):
+                result = _result_label(result)
+            if not self.queue.complete(job, result):
+                print(f"Job {job['_id']} finished after its lease ran out; result not stored")
+        finally:
+            # With a one-browser pool the sync just used must go back too
+            self._trim_syncs(self.max_syncs)
+        return True
+
+    def close(self):
+        for sync in self._syncs.values():
+            sync.close()
+        self._syncs.clear()
+
+
+def _batch_payloads(profile_urls, account, owner):
+    # The owner scopes /jobs and /connections/queue-status to the user who queued the job
+    payloads = []
+    for profile_url in profile_urls:
+        payload = {"profile_url": profile_url, "owner": owner}
+        if account:
+            payload["account"] = account
+        payloads.append(payload)
+    return payloads
+
+
+# Blocking Mongo writes; async callers run these in a thread
+def start_batch_run(job_type, profile_urls, account=None, owner=None) -> str:
+    # Every profile gets a pending checkpoint; the run id doubles as the queue batch id
+    run_id = batch_runs.start_run(job_type, account, profile_urls, owner=owner)
+    payloads = _batch_payloads(batch_runs.unfinished_profiles(run_id), account, owner)
+    linkedin_queue.enqueue_many(job_type, payloads, batch_id=run_id)
+    return run_id
+
+
+def resume_batch_run(run_id):
+    run = batch_runs.get_run(run_id)
+    if run is None:
+        return None
+    in_queue = linkedin_queue.active_profile_urls(run_id)
+    profile_urls = [
+        profile_url
+        for profile_url in batch_runs.unfinished_profiles(run_id)
+        if profile_url not in in_queue
+    ]
+    for profile_url in profile_urls:
+        batch_runs.checkpoint(run_id, profile_url, CheckpointStatus.PENDING)
+    payloads = _batch_payloads(profile_urls, run.get("account"), run.get("owner"))
+    linkedin_queue.enqueue_many(run["kind"], payloads, batch_id=run_id)
+    return len(payloads)
+
+
+def submit_job(job_type, payload, max_attempts=None) -> str:
+    """Queue one job for the worker processes and return its id right away."""
+    return linkedin_queue.enqueue(job_type, payload, max_attempts=max_attempts)
 
 
 # Function to send LinkedIn connection request using the ConnectionRequest class
 def send_linkedin_connection(profile_url: str):
-    sync = SendingConnectionRequest(profile_url)
-    sync.login("xxxx", "yyyy", cookies_location="cookies")
+    sync = SendingConnectionRequest(
+        profile_url, profile=BULK_PROFILE, account=CSV_LINKEDIN_EMAIL
+    )
 
     try:
+        sync.login(CSV_LINKEDIN_EMAIL, CSV_LINKEDIN_PASSWORD)
 
         connection_status = sync.send()
-        if connection_status in ["CONNECTED", "PENDING"]:
-            print(f"Already {connection_status} with {profile_url}")
+        if connection_status in [ProfileState.CONNECTED, ProfileState.PENDING]:
+            print(f"Already {connection_status.value} with {profile_url}")
         else:
             print(f"Connection request sent to {profile_url}")
-    except Exception as e:
-        print(f"Error sending request to {profile_url}: {e}")
+        return connection_status
+    finally:
+        sync.close()
 
 
-# Function to add profile URLs to the queue and process them sequentially
-async def process_csv_and_queue_requests(file: UploadFile):
+# Function to add profile URLs to the persistent queue
+async def process_csv_and_queue_requests(file: UploadFile, owner=None):
     content = await file.read()
     reader = csv.DictReader(StringIO(content.decode("utf-8")))
 
+    profile_urls = []
     for row in reader:
-        profile_data = {
-            "profile_url": row.get("profile_url")  # Only profile_url from CSV
-        }
-        if profile_data["profile_url"]:
-            profile_queue.append(profile_data)
-
-    if profile_queue:
-        asyncio.create_task(send_linkedin_connections_sequentially())
+        profile_url = row.get("profile_url")  # Only profile_url from CSV
+        if profile_url:
+            profile_urls.append(profile_url)
+
+    # Mongo writes run off the event loop
+    return await asyncio.to_thread(
+        start_batch_run, JOB_CSV_CONNECT, profile_urls, owner=owner
+    )
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves stay atomic but are not merged under a lock
+    fcntl = None
+
+AVATAR_DIR = os.getenv("AVATAR_DIR", os.path.join("data", "avatars"))
+AVATAR_WORKERS = int(os.getenv("AVATAR_WORKERS", "8"))
+# (connect, read) seconds
+AVATAR_TIMEOUT = (5, 15)
+
+
+def _url_key(url: str) -> str:
+    # LinkedIn rotates the signed query string; the path names the image version
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+
+
+class AvatarFetcher:
+    def __init__(self, directory=AVATAR_DIR, workers=AVATAR_WORKERS, timeout=AVATAR_TIMEOUT):
+        self.directory = directory
+        self.workers = workers
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=workers,
+            pool_maxsize=workers,
+            max_retries=Retry(
+                total=2, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]
+            ),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._manifest_path = os.path.join(directory, "manifest.json")
+        self._manifest = None
+        self._lock = threading.Lock()
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self._manifest_path) as handler:
+                return json.load(handler)
+        except (OSError, ValueError):
+            return {}
+
+    @property
+    def manifest(self) -> dict:
+        # Maps image URL (without query string) to the stored content-hash filename
+        if self._manifest is None:
+            self._manifest = self._read_manifest()
+        return self._manifest
+
+    def _save_manifest(self):
+        os.makedirs(self.directory, exist_ok=True)
+        # Every worker process shares the manifest; the lock file serialises their
+        # read-merge-write so none of them drops entries another one just added
+        with open(f"{self._manifest_path}.lock", "w") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            with self._lock:
+                merged = self._read_manifest()
+                merged.update(self.manifest)
+                self._manifest = merged
+                with tempfile.NamedTemporaryFile(
+                    "w", dir=self.directory, suffix=".tmp", delete=False
+                ) as handler:
+                    json.dump(merged, handler)
+            os.replace(handler.name, self._manifest_path)
+
+    def path(self, filename: str) -> str:
+        return os.path.join(self.directory, filename)
+
+    def fetch(self, img_url):
+        if not img_url or img_url.startswith("data:image/"):  # Placeholder image
+            return None
+        key = _url_key(img_url)
+        with self._lock:
+            known = self.manifest.get(key)
+        if known and os.path.exists(self.path(known)):
+            return known
+
+        try:
+            response = self.session.get(img_url, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            print(f"Could not download avatar {key}: {e}")
+            return None
+
+        filename = hashlib.sha256(response.content).hexdigest() + ".jpg"
+        path = self.path(filename)
+        # Identical images from different URLs share one file
+        if not os.path.exists(path):
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as handler:
+                handler.write(response.content)
+            os.replace(tmp_path, path)
+        with self._lock:
+            self.manifest[key] = filename
+        return filename
+
+    def fetch_all(self, img_urls) -> dict:
+        """Download every distinct URL concurrently; returns {url: filename or None}."""
+        urls = list(dict.fromkeys(url for url in img_urls if url))
+        if not urls:
+            return {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            filenames = list(executor.map(self.fetch, urls))
+        self._save_manifest()
+        return dict(zip(urls, filenames))
+
+
+avatar_fetcher = AvatarFetcher()
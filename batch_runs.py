@@ -0,0 +1,122 @@
+import datetime
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from database import get_batch_checkpoints_collection, get_batch_runs_collection
+
+
+class CheckpointStatus:
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class BatchRuns:
+    def __init__(self, runs=None, checkpoints=None):
+        self._runs = runs
+        self._checkpoints = checkpoints
+
+    @property
+    def runs(self):
+        if self._runs is None:
+            self._runs = get_batch_runs_collection()
+        return self._runs
+
+    @property
+    def checkpoints(self):
+        if self._checkpoints is None:
+            self._checkpoints = get_batch_checkpoints_collection()
+        return self._checkpoints
+
+    def start_run(self, kind, account, profile_urls, owner=None) -> str:
+        run_id = str(ObjectId())
+        now = _now()
+        # Duplicated links in the source list would otherwise be visited twice
+        profile_urls = list(dict.fromkeys(profile_urls))
+        self.runs.insert_one(
+            {
+                "_id": run_id,
+                "kind": kind,
+                "account": account,
+                # App user who started the run; only they may read or resume it
+                "owner": owner,
+                "total": len(profile_urls),
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+        if profile_urls:
+            try:
+                self.checkpoints.insert_many(
+                    [
+                        {
+                            "run_id": run_id,
+                            "profile_url": profile_url,
+                            "status": CheckpointStatus.PENDING,
+                            "result": None,
+                            "updated_at": now,
+                        }
+                        for profile_url in profile_urls
+                    ],
+                    ordered=False,
+                )
+            except BulkWriteError as e:
+                print(f"Skipped duplicate checkpoints for run {run_id}: {e.details['nInserted']} inserted")
+        return run_id
+
+    def get_run(self, run_id):
+        return self.runs.find_one({"_id": run_id})
+
+    def is_done(self, run_id, profile_url) -> bool:
+        return (
+            self.checkpoints.count_documents(
+                {
+                    "run_id": run_id,
+                    "profile_url": profile_url,
+                    "status": CheckpointStatus.DONE,
+                },
+                limit=1,
+            )
+            > 0
+        )
+
+    def checkpoint(self, run_id, profile_url, status, result=None):
+        now = _now()
+        self.checkpoints.update_one(
+            {"run_id": run_id, "profile_url": profile_url},
+            {"$set": {"status": status, "result": result, "updated_at": now}},
+            upsert=True,
+        )
+        self.runs.update_one({"_id": run_id}, {"$set": {"updated_at": now}})
+
+    def unfinished_profiles(self, run_id):
+        return [
+            checkpoint["profile_url"]
+            for checkpoint in self.checkpoints.find(
+                {"run_id": run_id, "status": {"$ne": CheckpointStatus.DONE}},
+                {"profile_url": 1},
+            )
+        ]
+
+    def summary(self, run_id) -> dict:
+        counts = {
+            CheckpointStatus.PENDING: 0,
+            CheckpointStatus.DONE: 0,
+            CheckpointStatus.FAILED: 0,
+        }
+        for row in self.checkpoints.aggregate(
+            [
+                {"$match": {"run_id": run_id}},
+                {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+            ]
+        ):
+            counts[row["_id"]] = row["count"]
+        return counts
+
+
+batch_runs = BatchRuns()
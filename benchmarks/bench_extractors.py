@@ -0,0 +1,146 @@
+"""Time and peak memory per 1k cards for the scrapers over the offline corpus.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_extractors
+    python -m benchmarks.bench_extractors --save baseline.json
+    python -m benchmarks.bench_extractors --compare baseline.json --tolerance 0.25
+
+Peak memory comes from tracemalloc, which only sees Python allocations; the C-side
+tree lxml builds is not counted.
+"""
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from benchmarks.bench_parsers import TARGET_CLASS, available_backends, extractors, scraper
+from benchmarks.corpus import PAGE_KINDS, fixtures
+from html_parsers import find_list_items
+
+LIST_KINDS = ("connections", "following", "followers")
+
+# The profile and experience flows read these through Selenium; parsing the snapshot
+# and running the same selectors measures the page side of that work
+PAGE_SELECTORS = {
+    "profile": [".text-body-medium.break-words", 'a[href*="/company/"]'],
+    "experience": ['a[href*="/company/"]'],
+}
+
+
+def measure(func, repeat):
+    """Median seconds over ``repeat`` runs and peak traced bytes of one extra run."""
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return statistics.median(timings), peak
+
+
+def _lookup_selectors(html, selectors):
+    soup = BeautifulSoup(html, "html.parser")
+    return [soup.select(selector) for selector in selectors]
+
+
+def cases(kind, html, backends):
+    """Yield (name, callable) for everything worth timing on one page."""
+    sync = scraper()
+    if kind in LIST_KINDS:
+        function = extractors()[kind]
+        for backend in backends:
+            yield (
+                f"_extract_li_from_div[{backend}]",
+                lambda backend=backend: sync._extract_li_from_div(
+                    html, TARGET_CLASS, function, backend
+                ),
+            )
+            # The per-card functions on their own, over already parsed cards
+            items = find_list_items(html, TARGET_CLASS, backend)
+            yield (
+                f"{function.__name__}[{backend}]",
+                lambda items=items: [function(item) for item in items],
+            )
+    else:
+        yield "select", lambda: _lookup_selectors(html, PAGE_SELECTORS[kind])
+
+
+def run(kinds, sizes, backends, repeat):
+    results = []
+    for kind, size, cards, html in fixtures(kinds, sizes):
+        print(f"\n{kind}-{size}: {cards} cards, {len(html) / 1024:.0f} KiB")
+        for name, func in cases(kind, html, backends):
+            seconds, peak = measure(func, repeat)
+            result = {
+                "page": f"{kind}-{size}",
+                "case": name,
+                "cards": cards,
+                "ms_per_1k": seconds * 1000 * 1000 / cards,
+                "kib_per_1k": peak / 1024 * 1000 / cards,
+            }
+            results.append(result)
+            print(
+                f"  {name:<40} {result['ms_per_1k']:9.1f} ms/1k  "
+                f"{result['kib_per_1k']:10.0f} KiB/1k"
+            )
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return a line per case that got slower or hungrier than the baseline allows."""
+    previous = {(result["page"], result["case"]): result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result["page"], result["case"]))
+        if before is None:
+            continue
+        for metric in ("ms_per_1k", "kib_per_1k"):
+            if before[metric] and result[metric] > before[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{result['page']} {result['case']} {metric}: "
+                    f"{before[metric]:.1f} -> {result[metric]:.1f}"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kind", nargs="*", choices=PAGE_KINDS, default=list(PAGE_KINDS))
+    parser.add_argument("--size", nargs="*", choices=["small", "medium", "large"])
+    parser.add_argument("--backend", nargs="*", choices=available_backends())
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Fail if results regress against this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = run(args.kind, args.size, args.backend or available_backends(), args.repeat)
+    if args.save:
+        with open(args.save, "w") as handler:
+            json.dump(results, handler, indent=2)
+    if args.compare:
+        with open(args.compare) as handler:
+            regressions = compare(results, json.load(handler), args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Throughput and per-step latency of the automation flows against the local stand-in.
+
+Drives the real classes from automation_functions.py through Chrome, so it needs a
+browser and chromedriver like the API does. Run from the repository root:
+
+    python -m benchmarks.bench_flows --profiles 20 --latency 0.2
+    python -m benchmarks.bench_flows --flows connect follow --pacing --rate-limits
+"""
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import time
+import urllib.request
+from collections import defaultdict
+
+import automation_functions
+from automation_functions import (
+    LIST_CONTAINER_CLASS,
+    ConnectionRequest,
+    ConnectionSync,
+    FollowSync,
+)
+from benchmarks.standin_server import PROFILE_STATES, start_server
+from browser_profiles import BROWSER_PROFILES, BULK_PROFILE
+from driver_pool import driver_pool
+from rate_scheduler import ACTION_LIMITS, LocalRateScheduler
+
+BENCH_ACCOUNT = "bench@example.com"
+
+# Module-level helpers the flows go through; timed alongside each flow's own methods
+MODULE_STEPS = (
+    "open_page",
+    "acquire_action_slot",
+    "wait_for_document_ready",
+    "wait_for_element",
+    "wait_until",
+)
+
+
+class StepTimer:
+    """Wraps functions in place and records how long every call took."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._patched = []
+
+    def wrap(self, owner, name, label=None):
+        original = getattr(owner, name)
+        samples = self.samples[label or name]
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - start)
+
+        setattr(owner, name, timed)
+        self._patched.append((owner, name, original))
+
+    def restore(self):
+        for owner, name, original in reversed(self._patched):
+            setattr(owner, name, original)
+        self._patched = []
+
+    def rows(self):
+        for name, samples in sorted(self.samples.items(), key=lambda item: -sum(item[1])):
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            yield (
+                name,
+                len(samples),
+                statistics.mean(samples) * 1000,
+                ordered[len(ordered) // 2] * 1000,
+                ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                sum(samples),
+            )
+
+
+def _connect_flow(base_url, profile):
+    sync = ConnectionRequest(email=BENCH_ACCOUNT, password="", profile=profile)
+    steps = ["send", "slide_down", "get_status", "_connect_from_button", "_connect_from_drop_down"]
+    return sync, steps, sync.send
+
+
+def _follow_flow(base_url, profile):
+    sync = FollowSync(email=BENCH_ACCOUNT, password="", profile=profile)
+    steps = [
+        "send",
+        "slide_down",
+        "get_status",
+        "_follow_from_button",
+        "_follow_from_drop_down",
+        "get_and_follow_company_profiles",
+    ]
+    return sync, steps, sync.send
+
+
+def _like_flow(base_url, profile):
+    sync = ConnectionSync(account=BENCH_ACCOUNT, profile=profile)
+    return sync, ["like_all_posts", "slide_down"], sync.like_all_posts
+
+
+def _message_flow(base_url, profile):
+    sync = ConnectionSync(account=BENCH_ACCOUNT, profile=profile)
+    return sync, ["send_message"], lambda url: sync.send_message(url, "Hello from the benchmark")
+
+
+def _list_flow(base_url, profile):
+    sync = ConnectionSync(account=BENCH_ACCOUNT, profile=profile)
+
+    def run(url):
+        # Same steps as get_following, pointed at the stand-in
+        sync._open_list_page(url)
+        sync._paginator(on_progress=None).run()
+        contacts, _ = sync._extract_cards(target_class=LIST_CONTAINER_CLASS, kind="following")
+        return len(contacts)
+
+    return sync, ["_open_list_page", "_extract_cards"], run
+
+
+# Flow name -> (builder, whether every profile state is exercised)
+FLOWS = {
+    "connect": (_connect_flow, True),
+    "follow": (_follow_flow, False),
+    "like": (_like_flow, False),
+    "message": (_message_flow, False),
+    "list": (_list_flow, False),
+}
+
+
+def flow_urls(base_url, flow, count):
+    if flow == "list":
+        return [f"{base_url}/mynetwork/network-manager/people-follow/following/"]
+    states = PROFILE_STATES if FLOWS[flow][1] else ("connect",)
+    return [f"{base_url}/in/{states[i % len(states)]}-{i}" for i in range(count)]
+
+
+def _server_call(base_url, path, method="GET"):
+    data = b"" if method == "POST" else None
+    request = urllib.request.Request(f"{base_url}{path}", data=data, method=method)
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read() or b"{}")
+
+
+def run_flow(flow, base_url, count, profile):
+    builder, _ = FLOWS[flow]
+    _server_call(base_url, "/api/reset", "POST")
+    timer = StepTimer()
+    sync, steps, run = builder(base_url, profile)
+    # The stand-in has no login page; mark the browser as signed in instead
+    sync.driver.account = BENCH_ACCOUNT
+    failures = []
+    results = []
+    try:
+        for name in MODULE_STEPS:
+            timer.wrap(automation_functions, name)
+        timer.wrap(automation_functions.human_pacing, "wait", "pacing")
+        for name in steps:
+            timer.wrap(sync, name)
+
+        urls = flow_urls(base_url, flow, count)
+        start = time.perf_counter()
+        for url in urls:
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results.append(run(url))
+            except Exception as e:
+                failures.append(f"{url}: {type(e).__name__}: {e}")
+        elapsed = time.perf_counter() - start
+    finally:
+        timer.restore()
+        sync.close()
+
+    if flow == "list":
+        unit, units = "items", sum(results)
+    else:
+        unit, units = "profiles", len(urls)
+    print(
+        f"\n{flow}: {units} {unit} in {elapsed:.1f} s -> {units / elapsed * 3600:,.0f} {unit}/hour, "
+        f"{len(failures)} failed"
+    )
+    print(f"  stand-in recorded {_server_call(base_url, '/api/stats')}")
+    for failure in failures[:3]:
+        print(f"  failure: {failure}")
+    print(f"  {'step':<36} {'calls':>6} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'total s':>8}")
+    for name, calls, mean, p50, p95, total in timer.rows():
+        print(f"  {name:<36} {calls:6d} {mean:9.1f} {p50:9.1f} {p95:9.1f} {total:8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--flows", nargs="*", choices=list(FLOWS), default=list(FLOWS))
+    parser.add_argument("--profiles", type=int, default=10, help="Profiles per flow")
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--list-size", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=40)
+    parser.add_argument("--posts", type=int, default=5)
+    parser.add_argument("--companies", type=int, default=2)
+    parser.add_argument("--browser-profile", choices=list(BROWSER_PROFILES), default=BULK_PROFILE)
+    parser.add_argument("--pacing", action="store_true", help="Keep the human pacing delays")
+    parser.add_argument("--rate-limits", action="store_true", help="Keep the per-account action limits")
+    args = parser.parse_args()
+
+    server, base_url = start_server(
+        latency=args.latency,
+        jitter=args.jitter,
+        page_size=args.page_size,
+        list_size=args.list_size,
+        posts=args.posts,
+        companies=args.companies,
+    )
+    pacing = automation_functions.human_pacing
+    saved = (pacing.min_interval, pacing.jitter, automation_functions.rate_scheduler)
+    if not args.pacing:
+        pacing.min_interval, pacing.jitter = 0, 0
+    # Buckets stay in this process, so runs neither need Mongo for them nor leave the
+    # bench account's buckets in the application database
+    if args.rate_limits:
+        automation_functions.rate_scheduler = LocalRateScheduler()
+    else:
+        unlimited = {action: {"hourly": 10**9} for action in ACTION_LIMITS}
+        automation_functions.rate_scheduler = LocalRateScheduler(unlimited)
+    try:
+        for flow in args.flows:
+            run_flow(flow, base_url, args.profiles, args.browser_profile)
+    finally:
+        pacing.min_interval, pacing.jitter, automation_functions.rate_scheduler = saved
+        driver_pool.shutdown()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Logins per second per core for /api/v1/initiate-login.
+
+Seeds throwaway users in the configured MongoDB, fires concurrent logins at the app
+in-process (no startup hooks, so no index builds or Stripe outbox) and removes the
+users and their OTPs afterwards. Run from the repository root:
+
+    python -m benchmarks.bench_login --users 200 --concurrency 32
+    python -m benchmarks.bench_login --rounds 12 --workers 4
+    python -m benchmarks.bench_login --seed-rounds 10 --rounds 12   # first login of each user rehashes
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+import authentication
+from database import get_otp_collection, get_user_collection
+from password_hashing import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PasswordHasher
+from usermanagement import app
+
+BENCH_PASSWORD = "bench-password"
+BENCH_EMAIL = "bench-login-{}@example.com"
+
+
+def seed_users(count, rounds):
+    emails = [BENCH_EMAIL.format(i) for i in range(count)]
+    # Every user gets the same hash; bcrypt still does the full work on each verify
+    hashed = PasswordHasher(rounds=rounds).context.hash(BENCH_PASSWORD)
+    users = get_user_collection()
+    users.delete_many({"email": {"$in": emails}})
+    users.insert_many(
+        [{"email": email, "password": hashed, "first_name": "Bench"} for email in emails]
+    )
+    return emails
+
+
+def remove_users(emails):
+    get_user_collection().delete_many({"email": {"$in": emails}})
+    get_otp_collection().delete_many({"email": {"$in": emails}})
+
+
+async def run_logins(client, emails, total, concurrency):
+    latencies = []
+    statuses = {}
+    pending = iter(range(total))
+
+    async def login_loop():
+        for i in pending:
+            start = time.perf_counter()
+            response = await client.post(
+                "/api/v1/initiate-login",
+                json={"email": emails[i % len(emails)], "password": BENCH_PASSWORD},
+            )
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(login_loop() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies, statuses
+
+
+async def bench(args, emails):
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60)
+    else:
+        transport = httpx.ASGITransport(app=app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60)
+    async with client:
+        # Warm the connection pools and hashing threads before timing
+        await run_logins(client, emails, min(len(emails), args.concurrency), args.concurrency)
+        return await run_logins(client, emails, args.logins, args.concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--logins", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=BCRYPT_ROUNDS, help="bcrypt cost the app uses")
+    parser.add_argument("--seed-rounds", type=int, help="bcrypt cost of the seeded hashes")
+    parser.add_argument("--workers", type=int, default=PASSWORD_HASH_WORKERS, help="Hashing threads")
+    parser.add_argument("--url", help="Hit a running server instead; --rounds/--workers are then ignored")
+    args = parser.parse_args()
+
+    seed_rounds = args.seed_rounds or args.rounds
+    hasher = PasswordHasher(rounds=args.rounds, workers=args.workers, queue_size=args.concurrency)
+    saved = authentication.password_hasher
+    authentication.password_hasher = hasher
+    emails = seed_users(args.users, seed_rounds)
+    try:
+        elapsed, latencies, statuses = asyncio.run(bench(args, emails))
+    finally:
+        authentication.password_hasher = saved
+        hasher.shutdown()
+        remove_users(emails)
+
+    cores = os.cpu_count() or 1
+    if not args.url:
+        cores = min(cores, args.workers)
+    ordered = sorted(latencies)
+    rate = len(latencies) / elapsed
+    print(
+        f"{len(latencies)} logins in {elapsed:.2f} s at concurrency {args.concurrency}, "
+        f"bcrypt cost {args.rounds} (seeded {seed_rounds}), {args.workers} hashing threads"
+    )
+    print(f"  statuses        {statuses}")
+    print(f"  logins/s        {rate:8.1f}")
+    print(f"  logins/s/core   {rate / cores:8.1f}  ({cores} cores)")
+    print(
+        f"  latency ms      p50 {ordered[len(ordered) // 2] * 1000:.1f}  "
+        f"p95 {ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000:.1f}  "
+        f"mean {statistics.mean(latencies) * 1000:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Compare HTML parser backends for the _extract_* scrapers on large list pages.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_parsers
+    python -m benchmarks.bench_parsers --cards 500 2000 --pages saved/connections.html
+"""
+import argparse
+import os
+import statistics
+import time
+
+import html_parsers
+from automation_functions import ConnectionSync
+from benchmarks.page_builder import build_list_page
+
+TARGET_CLASS = "scaffold-finite-scroll__content"
+
+
+def scraper():
+    # The extractors never touch the browser, so skip borrowing one from the pool
+    return ConnectionSync.__new__(ConnectionSync)
+
+
+def extractors():
+    sync = scraper()
+    return {
+        "connections": sync._extract_connection_info,
+        "following": sync._extract_following_info,
+        "followers": sync._extract_follower_info,
+    }
+
+
+def available_backends():
+    return [
+        backend
+        for backend in html_parsers.PARSER_BACKENDS
+        if backend != "lxml" or html_parsers.LXML_AVAILABLE
+    ]
+
+
+def _time(func, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def bench_page(label, html, kind, backends, repeat):
+    print(f"\n{label}: {len(html) / 1024:.0f} KiB")
+    function = extractors()[kind]
+    sync = scraper()
+    baseline = None
+    expected = None
+    for backend in backends:
+        seconds, records = _time(
+            lambda: sync._extract_li_from_div(html, TARGET_CLASS, function, backend),
+            repeat,
+        )
+        if expected is None:
+            expected = records
+        elif records != expected:
+            raise AssertionError(f"{backend} extracted different records than {backends[0]}")
+        baseline = baseline or seconds
+        print(
+            f"  {backend:<9} {seconds * 1000:9.1f} ms  {len(records):6d} cards  "
+            f"x{baseline / seconds:5.1f} vs {backends[0]}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, nargs="*", default=[100, 1000, 5000])
+    parser.add_argument("--kind", choices=list(extractors()), default="connections")
+    parser.add_argument("--pages", nargs="*", default=[], help="Saved HTML pages to parse")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    backends = available_backends()
+    for cards in args.cards:
+        bench_page(
+            f"synthetic {args.kind} page, {cards} cards",
+            build_list_page(cards, args.kind),
+            args.kind,
+            backends,
+            args.repeat,
+        )
+    for path in args.pages:
+        with open(path, encoding="utf-8") as handler:
+            bench_page(
+                os.path.basename(path), handler.read(), args.kind, backends, args.repeat
+            )
+
+
+if __name__ == "__main__":
+    main()
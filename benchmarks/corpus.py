@@ -0,0 +1,148 @@
+"""Offline corpus of anonymised LinkedIn page snapshots for the parser benchmarks.
+
+Run from the repository root:
+
+    python -m benchmarks.corpus build
+    python -m benchmarks.corpus anonymise saved/connections.html connections-real
+"""
+import argparse
+import gzip
+import os
+import re
+
+from benchmarks.page_builder import (
+    PLACEHOLDER_IMAGE,
+    build_experience_page,
+    build_list_page,
+    build_profile_page,
+)
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# Page kind -> size label -> number of cards (list items, or positions on profile pages)
+CORPUS_SIZES = {
+    "connections": {"small": 50, "medium": 500, "large": 2000},
+    "following": {"small": 50, "medium": 500, "large": 2000},
+    "followers": {"small": 50, "medium": 500, "large": 2000},
+    "profile": {"small": 5, "medium": 25, "large": 100},
+    "experience": {"small": 10, "medium": 100, "large": 500},
+}
+PAGE_KINDS = tuple(CORPUS_SIZES)
+
+# Text of these elements names or describes a member
+_PERSONAL_CLASSES = (
+    "mn-connection-card__name",
+    "mn-connection-card__occupation",
+    "entity-result__title-text",
+    "entity-result__primary-subtitle",
+    "entity-result__secondary-subtitle",
+    "text-heading-xlarge",
+    "text-body-medium",
+)
+_PROFILE_SLUG = re.compile(r"/in/([^/?\"']+)")
+
+
+def fixture_path(kind, size):
+    return os.path.join(CORPUS_DIR, f"{kind}-{size}.html.gz")
+
+
+def _build(kind, cards, seed):
+    if kind == "profile":
+        return build_profile_page(cards, seed=seed)
+    if kind == "experience":
+        return build_experience_page(cards, seed=seed)
+    return build_list_page(cards, kind, seed=seed)
+
+
+def write_fixture(path, html):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # mtime=0 keeps the files byte-identical across rebuilds
+    with open(path, "wb") as handler:
+        with gzip.GzipFile(fileobj=handler, mode="wb", compresslevel=9, mtime=0) as gz:
+            gz.write(html.encode("utf-8"))
+
+
+def build_corpus(seed=0):
+    paths = []
+    for kind, sizes in CORPUS_SIZES.items():
+        for size, cards in sizes.items():
+            path = fixture_path(kind, size)
+            write_fixture(path, _build(kind, cards, seed))
+            paths.append(path)
+    return paths
+
+
+def load_fixture(kind, size):
+    with gzip.open(fixture_path(kind, size), "rt", encoding="utf-8") as handler:
+        return handler.read()
+
+
+def fixtures(kinds=PAGE_KINDS, sizes=None):
+    """Yield (kind, size, cards, html) for every snapshot in the corpus."""
+    for kind in kinds:
+        for size, cards in CORPUS_SIZES[kind].items():
+            if sizes and size not in sizes:
+                continue
+            yield kind, size, cards, load_fixture(kind, size)
+
+
+def anonymise(html):
+    """Scrub names, profile slugs, images and inline data from a saved page."""
+    import lxml.html
+
+    root = lxml.html.document_fromstring(html)
+    for class_ in _PERSONAL_CLASSES:
+        xpath = f"//*[contains(concat(' ', normalize-space(@class), ' '), ' {class_} ')]"
+        for index, element in enumerate(root.xpath(xpath)):
+            holders = [child for child in element.iter() if (child.text or "").strip()]
+            for child in element.iter():
+                child.text = None
+                if child is not element:
+                    child.tail = None
+            # Keep the nesting so the extractors still find the text where they expect it
+            (holders[0] if holders else element).text = f"Member {index}"
+    for element in root.xpath("//*[@alt or @aria-label]"):
+        for attribute in ("alt", "aria-label"):
+            if element.get(attribute):
+                element.set(attribute, "Redacted")
+    for img in root.xpath("//img[@src]"):
+        img.set("src", PLACEHOLDER_IMAGE)
+    for code in root.xpath("//code"):
+        # Inline payloads carry profile data; keep their size so parse cost is unchanged
+        code.text = "x" * len(code.text or "")
+
+    slugs = {}
+    for element in root.xpath("//a[@href]"):
+        element.set(
+            "href",
+            _PROFILE_SLUG.sub(
+                lambda match: "/in/member-%d" % slugs.setdefault(match.group(1), len(slugs)),
+                element.get("href"),
+            ),
+        )
+    return lxml.html.tostring(root, doctype="<!DOCTYPE html>", encoding="unicode")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Regenerate the synthetic snapshots")
+    build.add_argument("--seed", type=int, default=0)
+    add = commands.add_parser("anonymise", help="Add a real saved page to the corpus")
+    add.add_argument("source", help="HTML file saved from the browser")
+    add.add_argument("name", help="Fixture name, e.g. connections-real")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        for path in build_corpus(args.seed):
+            print(f"{path}: {os.path.getsize(path) / 1024:.0f} KiB")
+    else:
+        with open(args.source, encoding="utf-8") as handler:
+            html = anonymise(handler.read())
+        path = os.path.join(CORPUS_DIR, f"{args.name}.html.gz")
+        write_fixture(path, html)
+        print(f"{path}: {len(html) / 1024:.0f} KiB uncompressed")
+
+
+if __name__ == "__main__":
+    main()
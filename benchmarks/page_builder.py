@@ -0,0 +1,216 @@
+import json
+import random
+
+# Markup mirrors the classes the scrapers in automation_functions.py look for
+PLACEHOLDER_IMAGE = "data:image/gif;base64,R0lGODlhAQABAAAAACw="
+
+FIRST_NAMES = ["Asha", "Ravi", "Maria", "John", "Wei", "Fatima", "Liam", "Sofia", "Arjun", "Emma"]
+LAST_NAMES = ["Sharma", "Patel", "Garcia", "Smith", "Chen", "Khan", "Brown", "Rossi", "Iyer", "Müller"]
+TITLES = [
+    "Software Engineer at Acme",
+    "Product Manager | SaaS",
+    "Head of Growth",
+    "Data Scientist at Initech",
+    "Recruiter - Tech Hiring",
+    "Founder & CEO",
+]
+
+
+def _person(rng, index):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    slug = f"{name.lower().replace(' ', '-')}-{index:06d}"
+    return name, slug, rng.choice(TITLES)
+
+
+def connection_card(rng, index):
+    name, slug, title = _person(rng, index)
+    return f"""
+<li class="mn-connection-card artdeco-list ember-view" id="ember{1000 + index}">
+  <a class="mn-connection-card__picture ember-view" href="/in/{slug}/">
+    <img class="presence-entity__image ember-view" src="{PLACEHOLDER_IMAGE}" alt="{name}">
+  </a>
+  <div class="mn-connection-card__details">
+    <a class="mn-connection-card__link ember-view" href="/in/{slug}/">
+      <span class="visually-hidden">Member’s name</span>
+      <span class="mn-connection-card__name t-16 t-black t-bold">{name}</span>
+      <span class="mn-connection-card__occupation t-14 t-black--light t-normal">{title}</span>
+    </a>
+    <time class="time-badge t-12 t-black--light t-normal">Connected 2 weeks ago</time>
+  </div>
+  <div class="mn-connection-card__action-container">
+    <button aria-label="Send a message to {name}" class="artdeco-button artdeco-button--2 artdeco-button--secondary ember-view" type="button">
+      <span class="artdeco-button__text">Message</span>
+    </button>
+  </div>
+</li>"""
+
+
+def entity_card(rng, index):
+    name, slug, title = _person(rng, index)
+    return f"""
+<li class="reusable-search__result-container">
+  <div class="entity-result">
+    <div class="entity-result__item">
+      <div class="entity-result__image">
+        <a class="app-aware-link scale-down" href="https://www.linkedin.com/in/{slug}">
+          <img class="presence-entity__image EntityPhoto-circle-3 evi-image lazy-image ember-view" src="{PLACEHOLDER_IMAGE}" alt="{name}">
+        </a>
+      </div>
+      <div class="entity-result__content entity-result__divider pt3 pb3 t-12 t-black--light">
+        <span class="entity-result__title-line entity-result__title-line--2-lines">
+          <span class="entity-result__title-text t-16">
+            <a class="app-aware-link" href="https://www.linkedin.com/in/{slug}">
+              <span dir="ltr"><span aria-hidden="true">{name}</span></span>
+            </a>
+          </span>
+        </span>
+        <div class="entity-result__primary-subtitle t-14 t-black t-normal">{title}</div>
+        <div class="entity-result__secondary-subtitle t-14 t-normal">Bengaluru, Karnataka, India</div>
+      </div>
+      <div class="entity-result__actions entity-result__divider">
+        <button aria-label="Following {name}" class="artdeco-button artdeco-button--2 artdeco-button--secondary ember-view" type="button">
+          <span class="artdeco-button__text">Following</span>
+        </button>
+      </div>
+    </div>
+  </div>
+</li>"""
+
+
+def _noise(rng, blocks):
+    # LinkedIn pages ship large inline JSON payloads and navigation chrome around the list
+    parts = []
+    for block in range(blocks):
+        payload = {
+            "data": {
+                "entityUrn": f"urn:li:fsd_profile:{rng.getrandbits(64):x}",
+                "included": [
+                    {"$type": "com.linkedin.voyager.dash.Profile", "id": i, "text": "x" * 60}
+                    for i in range(20)
+                ],
+            }
+        }
+        parts.append(
+            f'<code style="display: none" id="bpr-guid-{block}">{json.dumps(payload)}</code>'
+        )
+        parts.append(
+            '<nav class="global-nav"><ul>'
+            + "".join(
+                f'<li class="global-nav__primary-item"><a href="/feed/{i}">Item {i}</a></li>'
+                for i in range(8)
+            )
+            + "</ul></nav>"
+        )
+    return "\n".join(parts)
+
+
+def build_list_page(cards, kind="connections", seed=0, show_more=False, noise_blocks=None):
+    """Build a full list page with ``cards`` cards of ``kind`` (connections, following, followers)."""
+    rng = random.Random(seed)
+    card = connection_card if kind == "connections" else entity_card
+    noise_blocks = max(10, cards // 10) if noise_blocks is None else noise_blocks
+    items = "".join(card(rng, index) for index in range(cards))
+    show_more_button = (
+        '<button class="artdeco-button artdeco-button--muted scaffold-finite-scroll__load-button" type="button">'
+        '<span class="artdeco-button__text">Show more results</span></button>'
+        if show_more
+        else ""
+    )
+    return f"""<!DOCTYPE html>
+<html lang="en"><head><title>{kind.title()} | LinkedIn</title></head>
+<body>
+{_noise(rng, noise_blocks // 2)}
+<main class="scaffold-layout__main">
+  <section class="artdeco-card">
+    <div class="scaffold-finite-scroll scaffold-finite-scroll--infinite">
+      <div class="scaffold-finite-scroll__content" data-finite-scroll-hotkey-context="CONNECTIONS">
+        <ul>{items}
+        </ul>
+      </div>
+      {show_more_button}
+    </div>
+  </section>
+</main>
+{_noise(rng, noise_blocks - noise_blocks // 2)}
+</body></html>"""
+
+
+COMPANIES = ["Acme", "Initech", "Globex", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises"]
+
+
+def experience_card(rng, index):
+    company = rng.choice(COMPANIES)
+    slug = f"{company.lower().replace(' ', '-')}-{index:04d}"
+    start = 2024 - index
+    return f"""
+<li class="pvs-list__paged-list-item artdeco-list__item pvs-list__item--line-separated">
+  <div class="pvs-entity pvs-entity--padded pvs-list__item--no-padding-in-columns">
+    <a class="optional-action-target-wrapper display-flex" href="https://www.linkedin.com/company/{slug}/">
+      <img class="ivm-view-attr__img--centered EntityPhoto-square-3 evi-image lazy-image ember-view" src="{PLACEHOLDER_IMAGE}" alt="{company} logo">
+    </a>
+    <div class="display-flex flex-column full-width">
+      <span class="mr1 t-bold"><span aria-hidden="true">{rng.choice(TITLES)}</span></span>
+      <span class="t-14 t-normal"><span aria-hidden="true">{company} · Full-time</span></span>
+      <span class="t-14 t-normal t-black--light"><span aria-hidden="true">{start} - {start + 1} · 1 yr</span></span>
+    </div>
+  </div>
+</li>"""
+
+
+def _experience_list(rng, positions):
+    items = "".join(experience_card(rng, index) for index in range(positions))
+    return f"""
+      <div class="pvs-list__outer-container">
+        <ul class="pvs-list">{items}
+        </ul>
+      </div>"""
+
+
+def build_profile_page(positions=5, seed=0, noise_blocks=None):
+    """Build a profile page whose experience section lists ``positions`` positions."""
+    rng = random.Random(seed)
+    name, _, title = _person(rng, 0)
+    noise_blocks = max(10, positions // 10) if noise_blocks is None else noise_blocks
+    return f"""<!DOCTYPE html>
+<html lang="en"><head><title>{name} | LinkedIn</title></head>
+<body>
+{_noise(rng, noise_blocks // 2)}
+<main class="scaffold-layout__main">
+  <section class="artdeco-card pv-top-card">
+    <div class="pv-text-details__left-panel">
+      <h1 class="text-heading-xlarge inline t-24 v-align-middle break-words">{name}</h1>
+      <div class="text-body-medium break-words">{title}</div>
+      <span class="text-body-small inline t-black--light break-words">Bengaluru, Karnataka, India</span>
+    </div>
+    <div class="pvs-profile-actions">
+      <button aria-label="Invite {name} to connect" class="artdeco-button artdeco-button--2 artdeco-button--primary ember-view pvs-profile-actions__action" type="button">
+        <span class="artdeco-button__text">Connect</span>
+      </button>
+      <button aria-label="More actions" class="artdeco-dropdown__trigger artdeco-button artdeco-button--secondary artdeco-button--muted" type="button">
+        <span>More</span>
+      </button>
+    </div>
+  </section>
+  <section class="artdeco-card pv-profile-card" id="experience">
+    <h2 class="pvs-header__title">Experience</h2>{_experience_list(rng, positions)}
+  </section>
+</main>
+{_noise(rng, noise_blocks - noise_blocks // 2)}
+</body></html>"""
+
+
+def build_experience_page(positions, seed=0, noise_blocks=None):
+    """Build a /details/experience page listing ``positions`` positions."""
+    rng = random.Random(seed)
+    noise_blocks = max(10, positions // 10) if noise_blocks is None else noise_blocks
+    return f"""<!DOCTYPE html>
+<html lang="en"><head><title>Experience | LinkedIn</title></head>
+<body>
+{_noise(rng, noise_blocks // 2)}
+<main class="scaffold-layout__main">
+  <section class="artdeco-card pb3">
+    <h2 class="t-20 t-bold">Experience</h2>{_experience_list(rng, positions)}
+  </section>
+</main>
+{_noise(rng, noise_blocks - noise_blocks // 2)}
+</body></html>"""
@@ -0,0 +1,414 @@
+"""Local stand-in for the LinkedIn pages the automation classes drive.
+
+Pages carry the same XPaths and CSS classes as automation_functions.py targets.
+The profile slug picks how the profile behaves:
+
+    /in/connect-<n>/     Connect and Follow buttons in the header
+    /in/dropdown-<n>/    Connect only under "More actions"
+    /in/pending-<n>/     invitation already sent
+    /in/connected-<n>/   already a connection
+
+Run from the repository root:
+
+    python -m benchmarks.standin_server --port 8100 --latency 0.2
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.page_builder import COMPANIES, connection_card, entity_card
+
+PROFILE_STATES = ("connect", "dropdown", "pending", "connected")
+LIST_PAGES = {
+    "/mynetwork/invite-connect/connections/": "connections",
+    "/mynetwork/network-manager/people-follow/following/": "following",
+    "/mynetwork/network-manager/people-follow/followers/": "followers",
+}
+
+# Buttons report clicks back so the harness can check that actions really happened
+PAGE_SCRIPT = """
+<script>
+function record(action, target) {
+  fetch("/api/actions", {method: "POST", body: JSON.stringify({action: action, target: target})});
+}
+document.addEventListener("click", function (event) {
+  var button = event.target.closest("[data-action]");
+  if (!button) return;
+  var action = button.dataset.action, target = document.body.dataset.target;
+  if (action === "more") {
+    document.querySelector(".artdeco-dropdown__content").style.display = "block";
+  } else if (action === "connect") {
+    // Fetched on demand so "Add a note" only shows up in page_source once the modal is open
+    fetch("/api/invite-modal").then(function (response) {
+      return response.text();
+    }).then(function (html) {
+      document.getElementById("modal").innerHTML = html;
+    });
+  } else if (action === "send-invite") {
+    document.getElementById("modal").innerHTML = "";
+    var connect = document.querySelector("[data-action=connect]");
+    if (connect) {
+      connect.setAttribute("aria-label", "Pending, click to withdraw invitation sent to " + target);
+      connect.dataset.action = "withdraw";
+      connect.querySelector("span").textContent = "Pending";
+    }
+    record("invite", target);
+  } else if (action === "follow" && button.textContent.trim() === "Follow") {
+    button.querySelector("span").textContent = "Following";
+    record("follow", target);
+  } else if (action === "like") {
+    button.setAttribute("aria-pressed", "true");
+    record("like", button.dataset.post);
+  } else if (action === "message") {
+    document.getElementById("msg-form").style.display = "block";
+  } else if (action === "send-message") {
+    record("message", target);
+    document.getElementById("msg-form").style.display = "none";
+  } else if (action === "minimize") {
+    document.querySelector(".msg-overlay-list-bubble__content").style.display = "none";
+  } else if (action === "show-more") {
+    var list = document.querySelector(".scaffold-finite-scroll__content ul");
+    var start = list.children.length;
+    fetch(button.dataset.url + "?start=" + start).then(function (response) {
+      return response.json();
+    }).then(function (page) {
+      list.insertAdjacentHTML("beforeend", page.html);
+      if (!page.more) button.remove();
+    });
+  }
+});
+</script>"""
+
+MESSAGING_OVERLAY = """
+<aside class="msg-overlay-container">
+  <div class="msg-overlay-list-bubble">
+    <header class="msg-overlay-bubble-header">
+      <button class="msg-overlay-bubble-header__control artdeco-button artdeco-button--circle" data-action="minimize" type="button">
+        <svg data-test-icon="chevron-down-small" width="16" height="16"></svg>
+      </button>
+    </header>
+    <div class="msg-overlay-list-bubble__content">Messaging</div>
+  </div>
+</aside>"""
+
+INVITE_MODAL = """
+<div class="artdeco-modal" role="dialog">
+  <h2>Add a note to your invitation?</h2>
+  <button aria-label="Add a note" class="artdeco-button artdeco-button--secondary" type="button"><span>Add a note</span></button>
+  <button aria-label="Send without a note" class="artdeco-button artdeco-button--primary" data-action="send-invite" type="button"><span>Send without a note</span></button>
+</div>"""
+
+
+def _page(title, body, target=""):
+    return f"""<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>{title} | LinkedIn</title></head>
+<body data-target="{target}">
+{body}
+{MESSAGING_OVERLAY}
+{PAGE_SCRIPT}
+</body></html>"""
+
+
+def _header_button(action, label, text):
+    return (
+        f'<button aria-label="{label}" class="artdeco-button artdeco-button--2 '
+        f'artdeco-button--primary pvs-sticky-header-profile-actions__action" '
+        f'data-action="{action}" type="button"><span>{text}</span></button>'
+    )
+
+
+def profile_page(slug, state, followed=False):
+    name = slug.replace("-", " ").title()
+    buttons = []
+    dropdown = []
+    if state == "connect":
+        buttons.append(_header_button("connect", f"Invite {name} to connect", "Connect"))
+    elif state == "pending":
+        buttons.append(
+            _header_button("withdraw", f"Pending, click to withdraw invitation sent to {name}", "Pending")
+        )
+    elif state == "dropdown":
+        dropdown.append(
+            '<div class="artdeco-dropdown__item" data-action="connect" role="button"><span>Connect</span></div>'
+        )
+    elif state == "connected":
+        dropdown.append(
+            '<div class="artdeco-dropdown__item" role="button"><span>Remove Connection</span></div>'
+        )
+    buttons.append(
+        _header_button("follow", f"Follow {name}", "Following" if followed else "Follow")
+    )
+    dropdown.append(
+        '<div class="artdeco-dropdown__item" data-action="follow" role="button"><span>Follow</span></div>'
+    )
+    body = f"""
+<main class="scaffold-layout__main">
+  <section class="artdeco-card pv-top-card">
+    <h1 class="text-heading-xlarge inline t-24 v-align-middle break-words">{name}</h1>
+    <div class="text-body-medium break-words">Software Engineer at Acme</div>
+    <div class="pvs-profile-actions">
+      <button class="artdeco-button artdeco-button--2 artdeco-button--primary ember-view pvs-profile-actions__action" data-action="message" type="button">
+        <span>Message</span>
+      </button>
+    </div>
+  </section>
+  <div class="pvs-sticky-header-profile-actions">
+    <div class="artdeco-dropdown">
+      {"".join(buttons)}
+      <button aria-label="More actions" class="artdeco-dropdown__trigger artdeco-button artdeco-button--secondary" data-action="more" type="button">
+        <span>More</span>
+      </button>
+      <div class="artdeco-dropdown__content" style="display: none">{"".join(dropdown)}</div>
+    </div>
+  </div>
+  <div id="modal"></div>
+  <div class="msg-form" id="msg-form" style="display: none">
+    <div class="msg-form__contenteditable" contenteditable="true" role="textbox"></div>
+    <button class="msg-form__send-button artdeco-button artdeco-button--1" data-action="send-message" type="button">Send</button>
+  </div>
+</main>"""
+    return _page(name, body, target=slug)
+
+
+def experience_page(slug, companies):
+    items = "".join(
+        f"""
+<li class="pvs-list__paged-list-item artdeco-list__item">
+  <a class="optional-action-target-wrapper display-flex" href="/company/{COMPANIES[i % len(COMPANIES)].lower().replace(' ', '-')}-{i}/">
+    <span aria-hidden="true">{COMPANIES[i % len(COMPANIES)]}</span>
+  </a>
+</li>"""
+        for i in range(companies)
+    )
+    body = f"""
+<main class="scaffold-layout__main">
+  <section class="artdeco-card pb3"><ul class="pvs-list">{items}</ul></section>
+</main>"""
+    return _page("Experience", body, target=slug)
+
+
+def company_page(slug, followed=False):
+    body = f"""
+<main class="scaffold-layout__main">
+  <section class="org-top-card">
+    <h1 class="org-top-card-summary__title">{slug}</h1>
+    <div class="org-top-card-primary-actions">
+      <button aria-label="Follow {slug}" class="follow   org-company-follow-button org-top-card-primary-actions__action artdeco-button artdeco-button--primary" data-action="follow" type="button">
+        <span>{"Following" if followed else "Follow"}</span>
+      </button>
+    </div>
+  </section>
+</main>"""
+    return _page(slug, body, target=f"company/{slug}")
+
+
+def activity_page(slug, posts, liked):
+    items = "".join(
+        f"""
+<div class="feed-shared-update-v2">
+  <p class="update-components-text">Post {i}</p>
+  <button aria-label="React Like" aria-pressed="{'true' if f'{slug}/{i}' in liked else 'false'}" class="react-button__trigger artdeco-button" data-action="like" data-post="{slug}/{i}" type="button">
+    <span>Like</span>
+  </button>
+</div>"""
+        for i in range(posts)
+    )
+    return _page("Activity", f'<main class="scaffold-layout__main">{items}</main>', target=slug)
+
+
+def list_items(kind, start, count, total):
+    card = connection_card if kind == "connections" else entity_card
+    end = min(start + count, total)
+    # Seeded per card so every page of the list is stable across requests
+    return "".join(card(random.Random(index), index) for index in range(start, end)), end < total
+
+
+def list_page(path, kind, page_size, total):
+    items, more = list_items(kind, 0, page_size, total)
+    show_more = (
+        f'<button class="artdeco-button artdeco-button--muted scaffold-finite-scroll__load-button" '
+        f'data-action="show-more" data-url="/api/list{path}" type="button">'
+        f'<span class="artdeco-button__text">Show more results</span></button>'
+        if more
+        else ""
+    )
+    body = f"""
+<main class="scaffold-layout__main">
+  <section class="artdeco-card">
+    <div class="scaffold-finite-scroll scaffold-finite-scroll--infinite">
+      <div class="scaffold-finite-scroll__content">
+        <ul>{items}</ul>
+      </div>
+      {show_more}
+    </div>
+  </section>
+</main>"""
+    return _page(kind.title(), body)
+
+
+class StandInState:
+    """Server-side record of every action the pages reported."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.invited = set()
+            self.followed = set()
+            self.liked = set()
+            self.messages = []
+
+    def record(self, action, target):
+        with self._lock:
+            if action == "invite":
+                self.invited.add(target)
+            elif action == "follow":
+                self.followed.add(target)
+            elif action == "like":
+                self.liked.add(target)
+            elif action == "message":
+                self.messages.append(target)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "invited": len(self.invited),
+                "followed": len(self.followed),
+                "liked": len(self.liked),
+                "messages": len(self.messages),
+            }
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    server_version = "LinkedInStandIn/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _delay(self):
+        config = self.server.config
+        time.sleep(config["latency"] + random.uniform(0, config["jitter"]))
+
+    def _send(self, body, content_type="text/html; charset=utf-8", status=200):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._delay()
+        config = self.server.config
+        state = self.server.state
+        url = urlsplit(self.path)
+        path = url.path if url.path.endswith("/") else f"{url.path}/"
+        parts = [part for part in path.split("/") if part]
+
+        if path in LIST_PAGES:
+            return self._send(list_page(path, LIST_PAGES[path], config["page_size"], config["list_size"]))
+        if path.startswith("/api/list/") and path[len("/api/list"):] in LIST_PAGES:
+            start = int(parse_qs(url.query).get("start", ["0"])[0])
+            items, more = list_items(
+                LIST_PAGES[path[len("/api/list"):]], start, config["page_size"], config["list_size"]
+            )
+            return self._send(json.dumps({"html": items, "more": more}), "application/json")
+        if path == "/api/invite-modal/":
+            return self._send(INVITE_MODAL)
+        if path == "/api/stats/":
+            return self._send(json.dumps(state.stats()), "application/json")
+        if parts[:1] == ["company"] and len(parts) == 2:
+            return self._send(company_page(parts[1], f"company/{parts[1]}" in state.followed))
+        if parts[:1] == ["in"] and len(parts) >= 2:
+            slug = parts[1]
+            if parts[2:] == ["details", "experience"]:
+                return self._send(experience_page(slug, config["companies"]))
+            if parts[2:] == ["recent-activity", "all"]:
+                return self._send(activity_page(slug, config["posts"], state.liked))
+            if len(parts) == 2:
+                profile_state = slug.split("-")[0]
+                if profile_state not in PROFILE_STATES:
+                    profile_state = "connect"
+                if slug in state.invited and profile_state in ("connect", "dropdown"):
+                    profile_state = "pending"
+                return self._send(profile_page(slug, profile_state, slug in state.followed))
+        self._send(_page("Not found", "<main>Page not found</main>"), status=404)
+
+    def do_POST(self):
+        self._delay()
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        if self.path.rstrip("/") == "/api/actions":
+            payload = json.loads(body or b"{}")
+            self.server.state.record(payload.get("action"), payload.get("target"))
+            return self._send("{}", "application/json")
+        if self.path.rstrip("/") == "/api/reset":
+            self.server.state.reset()
+            return self._send("{}", "application/json")
+        self._send("{}", "application/json", status=404)
+
+
+def start_server(
+    host="127.0.0.1",
+    port=0,
+    latency=0.0,
+    jitter=0.0,
+    page_size=40,
+    list_size=200,
+    posts=5,
+    companies=2,
+):
+    """Serve the stand-in from a background thread; returns (server, base_url)."""
+    server = ThreadingHTTPServer((host, port), StandInHandler)
+    server.daemon_threads = True
+    server.config = {
+        "latency": latency,
+        "jitter": jitter,
+        "page_size": page_size,
+        "list_size": list_size,
+        "posts": posts,
+        "companies": companies,
+    }
+    server.state = StandInState()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random seconds, up to this")
+    parser.add_argument("--page-size", type=int, default=40, help="Cards per list page")
+    parser.add_argument("--list-size", type=int, default=200, help="Cards in each list")
+    parser.add_argument("--posts", type=int, default=5, help="Posts on each activity page")
+    parser.add_argument("--companies", type=int, default=2, help="Companies on each experience page")
+    args = parser.parse_args()
+
+    server, base_url = start_server(
+        args.host,
+        args.port,
+        args.latency,
+        args.jitter,
+        args.page_size,
+        args.list_size,
+        args.posts,
+        args.companies,
+    )
+    print(f"Serving the LinkedIn stand-in on {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
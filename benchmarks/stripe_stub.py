@@ -0,0 +1,181 @@
+"""Local stand-in for the Stripe customer API, for exercising the Stripe outbox offline.
+
+Honours Idempotency-Key the way Stripe does: a repeated key gets the first response
+back instead of a second customer. Point the app or `python -m stripe_outbox` at it:
+
+    python -m benchmarks.stripe_stub --port 12111 --failure-rate 0.2 --latency 0.3
+    STRIPE_API_BASE=http://127.0.0.1:12111 python -m stripe_outbox
+
+GET /_stub/stats reports customers created, replays and injected failures.
+send_webhook() delivers a signed event to the app's /stripe/webhook:
+
+    python -m benchmarks.stripe_stub --send-event event.json --to http://127.0.0.1:8000 \
+        --secret whsec_test
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+
+class StripeStubState:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.customers = {}
+            self.responses = {}
+            self.replays = 0
+            self.failures = 0
+
+    def create_customer(self, key, fields):
+        """Returns the stored response for a replayed key, or creates a new customer."""
+        with self._lock:
+            if key and key in self.responses:
+                self.replays += 1
+                return self.responses[key]
+            customer = {
+                "id": f"cus_{uuid.uuid4().hex[:14]}",
+                "object": "customer",
+                "created": int(time.time()),
+                "email": fields.get("email"),
+                "name": fields.get("name"),
+                "metadata": {
+                    name[len("metadata[") : -1]: value
+                    for name, value in fields.items()
+                    if name.startswith("metadata[")
+                },
+            }
+            self.customers[customer["id"]] = customer
+            if key:
+                self.responses[key] = customer
+            return customer
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "customers": len(self.customers),
+                "replays": self.replays,
+                "failures": self.failures,
+            }
+
+
+class StripeStubHandler(BaseHTTPRequestHandler):
+    server_version = "StripeStub/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, payload, status=200):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        # Keeps stripe-python from retrying on its own; the outbox does the retrying
+        self.send_header("Stripe-Should-Retry", "false")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status, error_type, message):
+        self._send({"error": {"type": error_type, "message": message}}, status)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/_stub/stats":
+            return self._send(self.server.state.stats())
+        self._error(404, "invalid_request_error", f"Unrecognized request URL (GET: {self.path})")
+
+    def do_POST(self):
+        config = self.server.config
+        state = self.server.state
+        time.sleep(config["latency"])
+        length = int(self.headers.get("Content-Length") or 0)
+        fields = dict(parse_qsl(self.rfile.read(length).decode("utf-8"))) if length else {}
+
+        if self.path.rstrip("/") == "/_stub/reset":
+            state.reset()
+            return self._send({})
+        if self.path.rstrip("/") != "/v1/customers":
+            return self._error(404, "invalid_request_error", f"Unrecognized request URL (POST: {self.path})")
+        if random.random() < config["failure_rate"]:
+            with state._lock:
+                state.failures += 1
+            return self._error(500, "api_error", "Injected failure from the Stripe stub")
+        if not fields.get("email"):
+            return self._error(400, "invalid_request_error", "Missing required param: email.")
+        self._send(state.create_customer(self.headers.get("Idempotency-Key"), fields))
+
+
+def start_stub(host="127.0.0.1", port=0, latency=0.0, failure_rate=0.0):
+    """Serve the stub from a background thread; returns (server, base_url)."""
+    server = ThreadingHTTPServer((host, port), StripeStubHandler)
+    server.daemon_threads = True
+    server.config = {"latency": latency, "failure_rate": failure_rate}
+    server.state = StripeStubState()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def signature_header(payload: bytes, secret: str, timestamp=None) -> str:
+    """Stripe-Signature value for ``payload``, as Stripe computes it."""
+    timestamp = int(timestamp or time.time())
+    signed = f"{timestamp}.".encode("utf-8") + payload
+    digest = hmac.new(secret.encode("utf-8"), signed, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def send_webhook(base_url, event, secret):
+    """POST ``event`` to ``base_url``/stripe/webhook; returns (status, response body)."""
+    payload = json.dumps(event).encode("utf-8")
+    request = urllib.request.Request(
+        f"{base_url.rstrip('/')}/stripe/webhook",
+        data=payload,
+        method="POST",
+        headers={
+            "Content-Type": "application/json",
+            "Stripe-Signature": signature_header(payload, secret),
+        },
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read() or b"{}")
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=12111)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every call")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of calls answered with a 500")
+    parser.add_argument("--send-event", help="JSON file of an event to deliver instead of serving")
+    parser.add_argument("--to", default="http://127.0.0.1:8000", help="App receiving --send-event")
+    parser.add_argument("--secret", default="whsec_test", help="The app's STRIPE_WEBHOOK_SECRET")
+    args = parser.parse_args()
+
+    if args.send_event:
+        with open(args.send_event, encoding="utf-8") as handler:
+            print(send_webhook(args.to, json.load(handler), args.secret))
+        return
+
+    server, base_url = start_stub(args.host, args.port, args.latency, args.failure_rate)
+    print(f"Serving the Stripe stub on {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+
+DEFAULT_PROFILE = "default"
+BULK_PROFILE = "bulk"
+
+# Blocked through the DevTools protocol so the bytes are never fetched at all
+BULK_BLOCKED_URLS = [
+    "*.jpg",
+    "*.jpeg",
+    "*.png",
+    "*.gif",
+    "*.webp",
+    "*.svg",
+    "*.ico",
+    "*.mp4",
+    "*.webm",
+    "*.m3u8",
+    "*.mp3",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.otf",
+    "*media.licdn.com*",
+    "*dms.licdn.com*",
+]
+
+BROWSER_PROFILES = {
+    DEFAULT_PROFILE: {
+        "arguments": [
+            # Uncomment for headless mode
+            # "--headless",
+        ],
+        "prefs": {},
+        "blocked_urls": [],
+    },
+    BULK_PROFILE: {
+        "arguments": [
+            "--headless=new",
+            "--disable-gpu",
+            "--disable-extensions",
+            "--disable-dev-shm-usage",
+            "--disable-background-networking",
+            "--disable-sync",
+            "--disable-default-apps",
+            "--disable-component-update",
+            "--mute-audio",
+            "--no-first-run",
+            "--blink-settings=imagesEnabled=false",
+            "--window-size=1366,900",
+        ],
+        "prefs": {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.media_stream": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        },
+        "blocked_urls": BULK_BLOCKED_URLS,
+    },
+}
+
+
+def get_browser_profile(name: str) -> dict:
+    try:
+        return BROWSER_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown browser profile: {name}")
+
+
+def build_chrome_options(name: str = DEFAULT_PROFILE) -> Options:
+    profile = get_browser_profile(name)
+    chrome_options = Options()
+    for argument in profile["arguments"]:
+        chrome_options.add_argument(argument)
+    if profile["prefs"]:
+        chrome_options.add_experimental_option("prefs", profile["prefs"])
+    return chrome_options
+
+
+def apply_network_blocking(driver, name: str = DEFAULT_PROFILE):
+    blocked_urls = get_browser_profile(name)["blocked_urls"]
+    if not blocked_urls:
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_urls})
+    except WebDriverException as e:
+        print(f"Could not enable request blocking for profile {name}: {e}")
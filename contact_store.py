@@ -0,0 +1,64 @@
+import datetime
+import os
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from database import get_contacts_collection
+
+CONTACT_UPSERT_BATCH = int(os.getenv("CONTACT_UPSERT_BATCH", "1000"))
+_DUPLICATE_KEY = 11000
+
+
+class ContactStore:
+    def __init__(self, collection=None, batch_size=CONTACT_UPSERT_BATCH):
+        self._collection = collection
+        self.batch_size = batch_size
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            self._collection = get_contacts_collection()
+        return self._collection
+
+    def _operations(self, owner, contacts, now):
+        operations = {}
+        for contact in contacts:
+            profile_link = contact.get("profile_link")
+            if not profile_link:
+                continue
+            fields = {k: v for k, v in contact.items() if k not in ("_id", "owner")}
+            # $set with unchanged values is a no-op in Mongo, so re-syncs only write the diff
+            operations[profile_link] = UpdateOne(
+                {"owner": owner, "profile_link": profile_link},
+                {"$set": fields, "$setOnInsert": {"created_at": now}},
+                upsert=True,
+            )
+        return list(operations.values())
+
+    def _write(self, operations, counts):
+        try:
+            result = self.collection.bulk_write(operations, ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+            errors = details["writeErrors"]
+            if any(error["code"] != _DUPLICATE_KEY for error in errors):
+                raise
+            # Another sync of the same owner inserted these first; they match now
+            self._write([operations[error["index"]] for error in errors], counts)
+        counts["inserted"] += details["nUpserted"]
+        counts["updated"] += details["nModified"]
+        counts["unchanged"] += details["nMatched"] - details["nModified"]
+
+    def upsert(self, owner, contacts) -> dict:
+        """Insert new contacts of ``owner`` and update changed ones; returns the counts."""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        operations = self._operations(owner, contacts, now)
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        for start in range(0, len(operations), self.batch_size):
+            self._write(operations[start : start + self.batch_size], counts)
+        return counts
+
+
+contact_store = ContactStore()
@@ -1,5 +1,7 @@
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from pymongo import ASCENDING, IndexModel, MongoClient
 from pymongo.collection import Collection
+from pymongo.errors import OperationFailure
 
 MONGODB_URL = "mongodb://localhost:27017/"
 DATABASE_NAME = "mydatabase"
@@ -13,6 +15,10 @@ profiles_collection: Collection = db["profiles"]
 contacts_collection: Collection = db["contacts"]
 contacts_collection: Collection = db["plans"]
 
+# Same database through motor, for async endpoints that must not block the event loop
+async_client = AsyncIOMotorClient(MONGODB_URL)
+async_db = async_client[DATABASE_NAME]
+
 
 def get_db():
     return db
@@ -36,3 +42,155 @@ def get_otp_collection() -> Collection:
 
 def get_contacts_collection() -> Collection:
     return db["contacts"]
+
+
+def get_sessions_collection() -> Collection:
+    return db["linkedin_sessions"]
+
+
+def get_jobs_collection() -> Collection:
+    return db["jobs"]
+
+
+def get_batch_runs_collection() -> Collection:
+    return db["batch_runs"]
+
+
+def get_batch_checkpoints_collection() -> Collection:
+    return db["batch_checkpoints"]
+
+
+def get_rate_buckets_collection() -> Collection:
+    return db["rate_buckets"]
+
+
+def get_async_db():
+    return async_db
+
+
+def get_async_user_collection() -> AsyncIOMotorCollection:
+    return async_db["users"]
+
+
+def get_async_user_profilecollection() -> AsyncIOMotorCollection:
+    return async_db["profiles"]
+
+
+def get_async_contacts_collection() -> AsyncIOMotorCollection:
+    return async_db["contacts"]
+
+
+def get_async_stripe_events_collection() -> AsyncIOMotorCollection:
+    return async_db["stripe_events"]
+
+
+# Indexes behind the hot lookups, per collection; applied at startup by ensure_indexes()
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True),
+        # Stripe webhooks find the user by customer id
+        IndexModel([("stripe_id", ASCENDING)], sparse=True),
+    ],
+    "profiles": [
+        IndexModel([("email", ASCENDING)], unique=True),
+        # Sparse so find_one({"linkedin_profile.username": {"$exists": True}}) reads the index
+        IndexModel([("linkedin_profile.username", ASCENDING)], sparse=True),
+    ],
+    "OTP": [
+        IndexModel([("email", ASCENDING)], unique=True),
+        # Mongo purges an OTP as soon as its valid_till passes
+        IndexModel([("valid_till", ASCENDING)], expireAfterSeconds=0),
+    ],
+    "contacts": [
+        # Contacts stored before syncs had an owner stay out of the unique index
+        IndexModel(
+            [("owner", ASCENDING), ("profile_link", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"owner": {"$exists": True}},
+        ),
+        IndexModel([("profile_link", ASCENDING)]),
+        IndexModel([("name", ASCENDING)]),
+    ],
+    "stripe_events": [
+        # Event ids only need remembering for as long as Stripe keeps retrying (3 days)
+        IndexModel([("received_at", ASCENDING)], expireAfterSeconds=7 * 86400),
+    ],
+    "linkedin_sessions": [
+        # Mongo purges a session as soon as its expires_at passes
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+        IndexModel([("email", ASCENDING)], unique=True),
+    ],
+    "jobs": [
+        IndexModel([("queue", ASCENDING), ("status", ASCENDING), ("available_at", ASCENDING)]),
+        IndexModel(
+            [("queue", ASCENDING), ("status", ASCENDING), ("lease_expires_at", ASCENDING)]
+        ),
+        IndexModel([("batch_id", ASCENDING)]),
+    ],
+    "batch_checkpoints": [
+        IndexModel([("run_id", ASCENDING), ("profile_url", ASCENDING)], unique=True),
+        IndexModel([("run_id", ASCENDING), ("status", ASCENDING)]),
+    ],
+}
+
+# Options that change what an index does; two indexes on the same key differing in
+# any of these are not interchangeable
+INDEX_OPTIONS = ("unique", "expireAfterSeconds", "sparse", "partialFilterExpression")
+
+
+def _index_key(index: IndexModel):
+    return list(index.document["key"].items())
+
+
+def _index_options(spec) -> dict:
+    # unique=False and sparse=False are the defaults, and Mongo reports them either way
+    return {
+        option: spec[option]
+        for option in INDEX_OPTIONS
+        if spec.get(option) not in (None, False)
+    }
+
+
+def _existing_index(collection, index: IndexModel):
+    """Name and options of the index on ``collection`` with the same key, or None."""
+    for name, info in collection.index_information().items():
+        if list(info["key"]) == _index_key(index):
+            return name, _index_options(info)
+    return None
+
+
+def missing_indexes(database=None) -> list:
+    """Registry indexes that do not exist or exist with other options, as (collection, key) pairs."""
+    database = db if database is None else database
+    missing = []
+    for collection_name, indexes in INDEXES.items():
+        for index in indexes:
+            existing = _existing_index(database[collection_name], index)
+            if existing is None or existing[1] != _index_options(index.document):
+                missing.append((collection_name, _index_key(index)))
+    return missing
+
+
+def ensure_indexes(database=None) -> list:
+    """Create every registry index; returns the ones that are still missing."""
+    database = db if database is None else database
+    for collection_name, indexes in INDEXES.items():
+        collection = database[collection_name]
+        for index in indexes:
+            try:
+                existing = _existing_index(collection, index)
+                if existing is not None and existing[1] == _index_options(index.document):
+                    continue
+                if existing is not None:
+                    # e.g. OTP email_1 from before it was made unique; Mongo will not
+                    # create a second index on the same key
+                    print(f"Rebuilding index {existing[0]} on {collection_name}: {existing[1]}")
+                    collection.drop_index(existing[0])
+                collection.create_indexes([index])
+            except OperationFailure as e:
+                # e.g. duplicate emails from before the unique index; the rest still apply
+                print(f"Could not create index {_index_key(index)} on {collection_name}: {e}")
+    missing = missing_indexes(database)
+    for collection_name, key in missing:
+        print(f"Missing index on {collection_name}: {key}")
+    return missing
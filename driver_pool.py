@@ -0,0 +1,198 @@
+import os
+import threading
+import time
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.service import Service
+
+from browser_profiles import DEFAULT_PROFILE, apply_network_blocking, build_chrome_options
+from driver_resolver import resolve_chromedriver
+
+DRIVER_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "4"))
+# Quit and replace a browser once it has served this many page loads
+DRIVER_MAX_NAVIGATIONS = int(os.getenv("DRIVER_MAX_NAVIGATIONS", "200"))
+DRIVER_CHECKOUT_TIMEOUT = int(os.getenv("DRIVER_CHECKOUT_TIMEOUT", "300"))
+# Number of browsers started when the API boots
+DRIVER_POOL_WARM = int(os.getenv("DRIVER_POOL_WARM", "1"))
+
+
+class DriverPoolExhausted(Exception):
+    pass
+
+
+class PooledDriver:
+    """Thin proxy around a Chrome WebDriver that counts page navigations."""
+
+    def __init__(self, driver, profile=DEFAULT_PROFILE):
+        self._driver = driver
+        self.profile = profile
+        self.navigations = 0
+        self.account = None
+        self.created_at = time.time()
+
+    def get(self, url):
+        self.navigations += 1
+        return self._driver.get(url)
+
+    def refresh(self):
+        self.navigations += 1
+        return self._driver.refresh()
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+class DriverPool:
+    def __init__(
+        self,
+        size=DRIVER_POOL_SIZE,
+        max_navigations=DRIVER_MAX_NAVIGATIONS,
+    ):
+        self.size = size
+        self.max_navigations = max_navigations
+        self._idle = []
+        self._busy = set()
+        self._condition = threading.Condition()
+
+    def _create_driver(self, profile=DEFAULT_PROFILE) -> PooledDriver:
+        chrome_options = build_chrome_options(profile)
+        driver = webdriver.Chrome(
+            service=Service(resolve_chromedriver()), options=chrome_options
+        )
+        apply_network_blocking(driver, profile)
+        return PooledDriver(driver, profile)
+
+    def _is_healthy(self, pooled: PooledDriver) -> bool:
+        if pooled.navigations >= self.max_navigations:
+            return False
+        try:
+            pooled.execute_script("return 1;")
+            return True
+        except WebDriverException:
+            return False
+
+    def _discard(self, pooled: PooledDriver):
+        try:
+            pooled.quit()
+        except Exception as e:
+            print(f"Error quitting pooled driver: {e}")
+
+    def _reset_session(self, pooled: PooledDriver):
+        # Another account's cookies must not leak into this checkout
+        try:
+            pooled.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        except WebDriverException:
+            pooled.delete_all_cookies()
+        pooled.account = None
+
+    def _take_idle(self, account, profile):
+        candidates = [pooled for pooled in self._idle if pooled.profile == profile]
+        if account is not None:
+            for pooled in candidates:
+                if pooled.account == account:
+                    self._idle.remove(pooled)
+                    return pooled
+        if candidates:
+            # Prefer browsers that carry no other account's session
+            for pooled in candidates:
+                if pooled.account is None:
+                    self._idle.remove(pooled)
+                    return pooled
+            self._idle.remove(candidates[0])
+            return candidates[0]
+        return None
+
+    def _evict_other_profile(self, profile):
+        # The pool is full of idle browsers of another profile; free one slot
+        for pooled in self._idle:
+            if pooled.profile != profile:
+                self._idle.remove(pooled)
+                return pooled
+        return None
+
+    def checkout(
+        self, account=None, profile=DEFAULT_PROFILE, timeout=DRIVER_CHECKOUT_TIMEOUT
+    ) -> PooledDriver:
+        deadline = time.monotonic() + timeout
+        while True:
+            evicted = None
+            with self._condition:
+                pooled = self._take_idle(account, profile)
+                create = False
+                if pooled is None and len(self._busy) + len(self._idle) < self.size:
+                    create = True
+                elif pooled is None and len(self._busy) < self.size:
+                    evicted = self._evict_other_profile(profile)
+                    create = evicted is not None
+                if pooled is None and not create:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise DriverPoolExhausted(
+                            f"No browser available after {timeout} seconds"
+                        )
+                    self._condition.wait(remaining)
+                    continue
+                # Reserve the slot before leaving the lock
+                placeholder = object()
+                self._busy.add(placeholder)
+
+            if evicted is not None:
+                self._discard(evicted)
+            try:
+                if pooled is not None and not self._is_healthy(pooled):
+                    self._discard(pooled)
+                    pooled = None
+                if pooled is None:
+                    pooled = self._create_driver(profile)
+                elif pooled.account is not None and pooled.account != account:
+                    # Also when no account was asked for: nobody inherits a signed-in session
+                    self._reset_session(pooled)
+            except Exception:
+                with self._condition:
+                    self._busy.discard(placeholder)
+                    self._condition.notify()
+                raise
+
+            with self._condition:
+                self._busy.discard(placeholder)
+                self._busy.add(pooled)
+            # pooled.account is only set by a successful login, so it names who is signed in
+            return pooled
+
+    def checkin(self, pooled: PooledDriver):
+        with self._condition:
+            if pooled not in self._busy:
+                return
+        healthy = self._is_healthy(pooled)
+        if not healthy:
+            self._discard(pooled)
+        with self._condition:
+            self._busy.discard(pooled)
+            if healthy:
+                self._idle.append(pooled)
+            self._condition.notify()
+
+    def warm(self, count=None, profile=DEFAULT_PROFILE):
+        count = self.size if count is None else min(count, self.size)
+        drivers = [self.checkout(profile=profile) for _ in range(count)]
+        for pooled in drivers:
+            self.checkin(pooled)
+
+    def shutdown(self):
+        with self._condition:
+            drivers = list(self._idle)
+            self._idle.clear()
+        for pooled in drivers:
+            self._discard(pooled)
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "busy": len(self._busy),
+            }
+
+
+driver_pool = DriverPool()
@@ -0,0 +1,96 @@
+import json
+import os
+import subprocess
+import threading
+from datetime import datetime, timezone
+
+# Pin an already-installed chromedriver binary; no download or version lookup is done
+CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH")
+CHROMEDRIVER_LOCKFILE = os.getenv("CHROMEDRIVER_LOCKFILE", "chromedriver.lock.json")
+# Refuse to reach the network even when no pinned or locked binary exists
+CHROMEDRIVER_OFFLINE = os.getenv("CHROMEDRIVER_OFFLINE", "0") == "1"
+
+_resolved_path = None
+_resolve_lock = threading.Lock()
+
+
+class ChromeDriverNotFound(Exception):
+    pass
+
+
+def _is_executable(path) -> bool:
+    return bool(path) and os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+def _driver_version(path) -> str:
+    try:
+        output = subprocess.run(
+            [path, "--version"], capture_output=True, text=True, timeout=10
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return ""
+    # "ChromeDriver 120.0.6099.109 (...)"
+    parts = output.split()
+    return parts[1] if len(parts) > 1 else output.strip()
+
+
+def _read_lockfile(lockfile=CHROMEDRIVER_LOCKFILE) -> dict:
+    try:
+        with open(lockfile) as handler:
+            return json.load(handler)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_lockfile(path, source, lockfile=CHROMEDRIVER_LOCKFILE) -> dict:
+    lock = {
+        "path": path,
+        "version": _driver_version(path),
+        "source": source,
+        "resolved_at": datetime.now(timezone.utc).isoformat(),
+    }
+    try:
+        with open(lockfile, "w") as handler:
+            json.dump(lock, handler, indent=2)
+    except OSError as e:
+        print(f"Could not write chromedriver lockfile {lockfile}: {e}")
+    return lock
+
+
+def _resolve() -> str:
+    if CHROMEDRIVER_PATH:
+        if not _is_executable(CHROMEDRIVER_PATH):
+            raise ChromeDriverNotFound(
+                f"Pinned chromedriver is not executable: {CHROMEDRIVER_PATH}"
+            )
+        lock = _read_lockfile()
+        if lock.get("path") != CHROMEDRIVER_PATH:
+            _write_lockfile(CHROMEDRIVER_PATH, "pinned")
+        return CHROMEDRIVER_PATH
+
+    lock = _read_lockfile()
+    if _is_executable(lock.get("path")):
+        return lock["path"]
+
+    if CHROMEDRIVER_OFFLINE:
+        raise ChromeDriverNotFound(
+            "Offline mode is on and no pinned or locked chromedriver was found. "
+            "Set CHROMEDRIVER_PATH to an installed binary."
+        )
+
+    # Only reached on the first boot of a worker or after the locked binary went away
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    path = ChromeDriverManager().install()
+    _write_lockfile(path, "webdriver_manager")
+    return path
+
+
+def resolve_chromedriver() -> str:
+    global _resolved_path
+    if _resolved_path is None:
+        with _resolve_lock:
+            if _resolved_path is None:
+                _resolved_path = _resolve()
+                print(f"Using chromedriver at {_resolved_path}")
+    return _resolved_path
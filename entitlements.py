@@ -0,0 +1,138 @@
+import datetime
+import os
+import time
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from database import (
+    get_async_stripe_events_collection,
+    get_async_user_collection,
+    get_user_collection,
+)
+from ttl_cache import TTLCache
+
+STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
+# The process that receives a webhook drops its entry at once; this bounds how long
+# the other API processes keep serving the old plan
+ENTITLEMENT_CACHE_TTL = int(os.getenv("ENTITLEMENT_CACHE_TTL", "60"))
+
+SUBSCRIPTION_EVENTS = (
+    "customer.subscription.created",
+    "customer.subscription.updated",
+    "customer.subscription.deleted",
+)
+CHECKOUT_COMPLETED = "checkout.session.completed"
+
+entitlement_cache = TTLCache(ttl=ENTITLEMENT_CACHE_TTL)
+
+
+def get_plan(email):
+    """The user's currentPlan, from the cache when possible; None if there is no such user."""
+    plan = entitlement_cache.get(email)
+    if plan is not None:
+        return plan
+    user = get_user_collection().find_one({"email": email}, {"currentPlan": 1, "_id": 0})
+    if user is None:
+        return None
+    plan = user.get("currentPlan") or {}
+    entitlement_cache.put(email, plan)
+    return plan
+
+
+def has_active_plan(plan) -> bool:
+    if not plan:
+        return False
+    if plan.get("is_subscribed"):
+        return True
+    trial_end = plan.get("trial_end")
+    return bool(plan.get("is_trial_active")) and (not trial_end or trial_end > time.time())
+
+
+def invalidate_entitlement(email):
+    entitlement_cache.invalidate(email)
+
+
+def _subscription_plan(subscription) -> dict:
+    items = (subscription.get("items") or {}).get("data") or []
+    price = (items[0].get("price") or {}) if items else {}
+    status = subscription.get("status")
+    return {
+        "planId": price.get("id") or (subscription.get("metadata") or {}).get("planId"),
+        "subscription_id": subscription.get("id"),
+        "status": status,
+        "is_subscribed": status == "active",
+        "is_trial_active": status == "trialing",
+        "trial_end": subscription.get("trial_end"),
+    }
+
+
+def _checkout_plan(session):
+    # Unpaid sessions (e.g. delayed payment methods) wait for the subscription events
+    if session.get("mode") != "subscription" or session.get("payment_status") not in (
+        "paid",
+        "no_payment_required",
+    ):
+        return None
+    return {
+        "planId": (session.get("metadata") or {}).get("planId"),
+        "subscription_id": session.get("subscription"),
+        "status": "active",
+        "is_subscribed": True,
+    }
+
+
+async def apply_stripe_event(event) -> str:
+    """Fold a verified Stripe event into the customer's currentPlan; safe to call twice.
+
+    Returns what happened: applied, duplicate, stale, ignored or unknown_customer.
+    """
+    events = get_async_stripe_events_collection()
+    if await events.find_one({"_id": event["id"]}, {"_id": 1}):
+        return "duplicate"
+
+    data = event["data"]["object"]
+    if event["type"] in SUBSCRIPTION_EVENTS:
+        plan = _subscription_plan(data)
+    elif event["type"] == CHECKOUT_COMPLETED:
+        plan = _checkout_plan(data)
+    else:
+        plan = None
+    if plan is None:
+        return "ignored"
+
+    created = event["created"]
+    fields = {f"currentPlan.{name}": value for name, value in plan.items() if value is not None}
+    fields["currentPlan.event_created"] = created
+    # Stripe does not deliver in order; an event older than the last one applied is dropped
+    user = await get_async_user_collection().find_one_and_update(
+        {
+            "stripe_id": data.get("customer"),
+            "$or": [
+                {"currentPlan.event_created": {"$exists": False}},
+                {"currentPlan.event_created": {"$lte": created}},
+            ],
+        },
+        {"$set": fields},
+        projection={"email": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    if user is None:
+        known = await get_async_user_collection().find_one(
+            {"stripe_id": data.get("customer")}, {"_id": 1}
+        )
+        return "stale" if known else "unknown_customer"
+    invalidate_entitlement(user["email"])
+
+    # Recorded only after the update, so a failed apply is retried by Stripe
+    try:
+        await events.insert_one(
+            {
+                "_id": event["id"],
+                "type": event["type"],
+                "received_at": datetime.datetime.now(datetime.timezone.utc),
+            }
+        )
+    except DuplicateKeyError:
+        pass
+    return "applied"
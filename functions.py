@@ -1,7 +1,16 @@
+import datetime
+import os
 import random
 import string
 
-from database import get_user_collection
+from database import get_otp_collection, get_user_profilecollection
+from ttl_cache import TTLCache
+
+OTP_VALIDITY_MINUTES = 5
+# Writes from other processes (the queue workers) show up after at most this long
+USER_PROFILE_CACHE_TTL = int(os.getenv("USER_PROFILE_CACHE_TTL", "300"))
+
+profile_cache = TTLCache(ttl=USER_PROFILE_CACHE_TTL)
 
 
 def generate_otp(length=6):
@@ -9,26 +18,57 @@ def generate_otp(length=6):
     return "".join(random.choices(string.digits, k=length))
 
 
-def get_user_profile(user_id: str):
-    user_collection = get_user_collection()
-    user = user_collection.find_one({"_id": user_id})
-    if not user:
-        return {}
+def store_otp(user, email, otp, method="email"):
+    """Replace any pending OTP of ``email`` with ``otp``; returns its expiry."""
+    valid_till = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(
+        minutes=OTP_VALIDITY_MINUTES
+    )
+    # The TTL index on valid_till purges the document once it expires
+    get_otp_collection().replace_one(
+        {"email": email},
+        {
+            "user_id": str(user["_id"]),
+            "OTP": otp,
+            "method": method,
+            "valid_till": valid_till,
+            "email": email,
+        },
+        upsert=True,
+    )
+    return valid_till
 
-    # Assume the profile is stored in a separate collection
-    profile = user_collection.find_one({"user_id": user_id})
 
-    if not profile:
-        # If no profile is found, return the user's name from the user collection
-        return {
-            "avatar": "",
-            "full_name": f"{user['first_name']} {user.get('last_name', '')}",
+def consume_otp(email, otp):
+    """Delete and return the OTP document if ``otp`` is the unexpired code for ``email``."""
+    return get_otp_collection().find_one_and_delete(
+        {
+            "email": email,
+            "OTP": otp,
+            "valid_till": {"$gt": datetime.datetime.now(datetime.timezone.utc)},
         }
+    )
+
 
-    # If profile exists, return the avatar and full name
-    return {
+def get_user_profile(user):
+    """Avatar and display name for ``user``, an already loaded users document."""
+    cached = profile_cache.get(user["email"])
+    if cached is not None:
+        return dict(cached)
+
+    # Profiles are keyed by the owner's email, which has a unique index
+    profile = get_user_profilecollection().find_one(
+        {"email": user["email"]}, {"avatar": 1, "full_name": 1, "_id": 0}
+    ) or {}
+    result = {
         "avatar": profile.get("avatar", ""),
         "full_name": profile.get(
             "full_name", f"{user['first_name']} {user.get('last_name', '')}"
         ),
     }
+    profile_cache.put(user["email"], result)
+    return dict(result)
+
+
+def invalidate_user_profile(email):
+    """Drop the cached profile of ``email``; call after writing to its profile."""
+    profile_cache.invalidate(email)
@@ -0,0 +1,101 @@
+import os
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml.html
+
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# "full" builds the whole page tree with BeautifulSoup (the old behaviour), "strainer"
+# only materialises the target container, "lxml" parses in C and wraps the cards in
+# LxmlTag so the _extract_* functions keep working on them unchanged
+PARSER_BACKENDS = ("full", "strainer", "lxml")
+DEFAULT_PARSER_BACKEND = os.getenv(
+    "HTML_PARSER_BACKEND", "lxml" if LXML_AVAILABLE else "strainer"
+)
+
+
+def _class_xpath(name, class_):
+    name = name or "*"
+    if class_ is None:
+        return f".//{name}"
+    return (
+        f".//{name}[contains(concat(' ', normalize-space(@class), ' '), ' {class_} ')]"
+    )
+
+
+class LxmlTag:
+    """The subset of the BeautifulSoup Tag API the scrapers use, backed by lxml."""
+
+    def __init__(self, element):
+        self._element = element
+
+    @property
+    def name(self):
+        return self._element.tag
+
+    def find(self, name=None, class_=None):
+        found = self._element.xpath(_class_xpath(name, class_))
+        return LxmlTag(found[0]) if found else None
+
+    def find_all(self, name=None, class_=None):
+        return [LxmlTag(found) for found in self._element.xpath(_class_xpath(name, class_))]
+
+    def get_text(self, separator="", strip=False):
+        texts = self._element.xpath(".//text()")
+        if strip:
+            texts = [text.strip() for text in texts if text.strip()]
+        return separator.join(texts)
+
+    def get(self, key, default=None):
+        return self._element.get(key, default)
+
+    def __getitem__(self, key):
+        value = self._element.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+
+def _check_backend(backend):
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser backend: {backend}")
+    if backend == "lxml" and not LXML_AVAILABLE:
+        raise ValueError("The lxml parser backend needs the lxml package installed")
+
+
+def find_containers(html_content: str, target_class: str, backend=None):
+    backend = backend or DEFAULT_PARSER_BACKEND
+    _check_backend(backend)
+    if backend == "lxml":
+        root = lxml.html.document_fromstring(html_content)
+        return [LxmlTag(div) for div in root.xpath(_class_xpath("div", target_class))]
+    if backend == "full":
+        soup = BeautifulSoup(html_content, "html.parser")
+    else:
+        soup = BeautifulSoup(
+            html_content,
+            "html.parser",
+            parse_only=SoupStrainer("div", class_=target_class),
+        )
+    return soup.find_all("div", class_=target_class)
+
+
+def find_list_items(html_content: str, target_class: str, backend=None):
+    li_elements = []
+    for div in find_containers(html_content, target_class, backend):
+        li_elements.extend(div.find_all("li"))
+    return li_elements
+
+
+def parse_list_item(item_html: str, backend=None):
+    backend = backend or DEFAULT_PARSER_BACKEND
+    _check_backend(backend)
+    if backend == "lxml":
+        element = lxml.html.fragment_fromstring(item_html, create_parent="div")
+        found = element.xpath("./li")
+        return LxmlTag(found[0]) if found else None
+    return BeautifulSoup(item_html, "html.parser").li
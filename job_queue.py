@@ -0,0 +1,284 @@
+import datetime
+import os
+import socket
+import zlib
+
+from bson import ObjectId
+from pymongo import ASCENDING, ReturnDocument
+
+from database import get_jobs_collection
+
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "600"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_SECONDS = int(os.getenv("JOB_BACKOFF_SECONDS", "30"))
+JOB_BACKOFF_MAX_SECONDS = int(os.getenv("JOB_BACKOFF_MAX_SECONDS", "3600"))
+
+
+class JobStatus:
+    QUEUED = "queued"
+    LEASED = "leased"
+    DONE = "done"
+    DEAD = "dead"
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def shard_key(payload) -> int:
+    # Jobs of one LinkedIn account always land on the same worker shard, which keeps its
+    # signed-in browser and session in a single process
+    return zlib.crc32((payload.get("account") or "").encode("utf-8"))
+
+
+class JobQueue:
+    def __init__(
+        self,
+        name,
+        collection=None,
+        lease_seconds=JOB_LEASE_SECONDS,
+        max_attempts=JOB_MAX_ATTEMPTS,
+        backoff_seconds=JOB_BACKOFF_SECONDS,
+    ):
+        self.name = name
+        self._collection = collection
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            self._collection = get_jobs_collection()
+        return self._collection
+
+    def _new_job(self, job_type, payload, batch_id, now, max_attempts=None):
+        return {
+            "queue": self.name,
+            "type": job_type,
+            "payload": payload,
+            "batch_id": batch_id,
+            "shard_key": shard_key(payload),
+            "status": JobStatus.QUEUED,
+            "attempts": 0,
+            "max_attempts": max_attempts or self.max_attempts,
+            "progress": None,
+            "available_at": now,
+            "lease_expires_at": None,
+            "leased_by": None,
+            "lease_token": None,
+            "last_error": None,
+            "result": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+    def enqueue(self, job_type, payload, batch_id=None, max_attempts=None) -> str:
+        result = self.collection.insert_one(
+            self._new_job(job_type, payload, batch_id, _now(), max_attempts)
+        )
+        return str(result.inserted_id)
+
+    def enqueue_many(self, job_type, payloads, batch_id=None) -> str:
+        batch_id = batch_id or str(ObjectId())
+        now = _now()
+        jobs = [self._new_job(job_type, payload, batch_id, now) for payload in payloads]
+        if jobs:
+            self.collection.insert_many(jobs, ordered=False)
+        return batch_id
+
+    def _max_attempts(self):
+        # Jobs queued before max_attempts was stored per job use the queue's limit
+        return {"$ifNull": ["$max_attempts", self.max_attempts]}
+
+    def _leased(self, job):
+        # Only the worker holding the current lease may settle the job; one whose lease
+        # ran out and was handed to another worker matches nothing
+        return {"_id": job["_id"], "status": JobStatus.LEASED, "lease_token": job.get("lease_token")}
+
+    def bury_expired(self, now=None) -> int:
+        """Dead-letter jobs whose lease ran out on their last attempt, e.g. a crashed worker."""
+        now = now or _now()
+        result = self.collection.update_many(
+            {
+                "queue": self.name,
+                "status": JobStatus.LEASED,
+                "lease_expires_at": {"$lte": now},
+                "$expr": {"$gte": ["$attempts", self._max_attempts()]},
+            },
+            {
+                "$set": {
+                    "status": JobStatus.DEAD,
+                    "last_error": "Lease expired on the last attempt",
+                    "lease_expires_at": None,
+                    "lease_token": None,
+                    "updated_at": now,
+                }
+            },
+        )
+        return result.modified_count
+
+    def lease(self, worker_id=None, shard=None):
+        """Atomically claim the next due job, or one whose lease ran out with attempts left.
+
+        ``shard`` is an ``(index, count)`` pair limiting the claim to that share of accounts.
+        """
+        now = _now()
+        self.bury_expired(now)
+        query = {
+            "queue": self.name,
+            "$or": [
+                {"status": JobStatus.QUEUED, "available_at": {"$lte": now}},
+                {
+                    "status": JobStatus.LEASED,
+                    "lease_expires_at": {"$lte": now},
+                    "$expr": {"$lt": ["$attempts", self._max_attempts()]},
+                },
+            ],
+        }
+        if shard and shard[1] > 1:
+            index, count = shard
+            in_shard = [{"shard_key": {"$mod": [count, index]}}]
+            if index == 0:
+                # Jobs queued before sharding existed
+                in_shard.append({"shard_key": {"$exists": False}})
+            query["$and"] = [{"$or": in_shard}]
+        return self.collection.find_one_and_update(
+            query,
+            {
+                "$set": {
+                    "status": JobStatus.LEASED,
+                    "leased_by": worker_id or default_worker_id(),
+                    "lease_token": str(ObjectId()),
+                    "lease_expires_at": now
+                    + datetime.timedelta(seconds=self.lease_seconds),
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("available_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def complete(self, job, result=None) -> bool:
+        """Store the result; False if the lease was lost and the job belongs to another worker."""
+        updated = self.collection.update_one(
+            self._leased(job),
+            {
+                "$set": {
+                    "status": JobStatus.DONE,
+                    "result": result,
+                    "lease_expires_at": None,
+                    "lease_token": None,
+                    "updated_at": _now(),
+                }
+            },
+        )
+        return updated.modified_count == 1
+
+    def fail(self, job, error, retry=True):
+        """Requeue the job with backoff, or bury it once attempts run out or ``retry`` is off.
+
+        Returns the new status, or None if the lease was lost to another worker.
+        """
+        now = _now()
+        update = {
+            "last_error": str(error),
+            "lease_expires_at": None,
+            "lease_token": None,
+            "updated_at": now,
+        }
+        if not retry or job["attempts"] >= job.get("max_attempts", self.max_attempts):
+            update["status"] = JobStatus.DEAD
+        else:
+            delay = min(
+                self.backoff_seconds * 2 ** (job["attempts"] - 1),
+                JOB_BACKOFF_MAX_SECONDS,
+            )
+            update["status"] = JobStatus.QUEUED
+            update["available_at"] = now + datetime.timedelta(seconds=delay)
+        updated = self.collection.update_one(self._leased(job), {"$set": update})
+        return update["status"] if updated.modified_count == 1 else None
+
+    def defer(self, job, seconds):
+        """Put a leased job back without counting the attempt, e.g. when rate limited."""
+        now = _now()
+        self.collection.update_one(
+            self._leased(job),
+            {
+                "$set": {
+                    "status": JobStatus.QUEUED,
+                    "available_at": now + datetime.timedelta(seconds=seconds),
+                    "lease_expires_at": None,
+                    "lease_token": None,
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": -1},
+            },
+        )
+
+    def report_progress(self, job, progress) -> bool:
+        # Doubles as a heartbeat so long jobs keep their lease
+        now = _now()
+        updated = self.collection.update_one(
+            self._leased(job),
+            {
+                "$set": {
+                    "progress": progress,
+                    "lease_expires_at": now + datetime.timedelta(seconds=self.lease_seconds),
+                    "updated_at": now,
+                }
+            },
+        )
+        return updated.modified_count == 1
+
+    def get(self, job_id):
+        if not ObjectId.is_valid(job_id):
+            return None
+        return self.collection.find_one({"_id": ObjectId(job_id), "queue": self.name})
+
+    def status(self, batch_id=None, owner=None) -> dict:
+        match = {"queue": self.name}
+        if batch_id:
+            match["batch_id"] = batch_id
+        if owner:
+            match["payload.owner"] = owner
+        counts = {
+            JobStatus.QUEUED: 0,
+            JobStatus.LEASED: 0,
+            JobStatus.DONE: 0,
+            JobStatus.DEAD: 0,
+        }
+        for row in self.collection.aggregate(
+            [{"$match": match}, {"$group": {"_id": "$status", "count": {"$sum": 1}}}]
+        ):
+            counts[row["_id"]] = row["count"]
+        return counts
+
+    def active_profile_urls(self, batch_id) -> set:
+        return {
+            job["payload"].get("profile_url")
+            for job in self.collection.find(
+                {
+                    "queue": self.name,
+                    "batch_id": batch_id,
+                    "status": {"$in": [JobStatus.QUEUED, JobStatus.LEASED]},
+                },
+                {"payload.profile_url": 1},
+            )
+        }
+
+    def dead_letters(self, batch_id=None, limit=100, owner=None):
+        query = {"queue": self.name, "status": JobStatus.DEAD}
+        if batch_id:
+            query["batch_id"] = batch_id
+        if owner:
+            query["payload.owner"] = owner
+        return list(self.collection.find(query).limit(limit))
+
+
+linkedin_queue = JobQueue("linkedin")
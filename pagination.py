@@ -0,0 +1,127 @@
+import os
+import time
+
+from wait_engine import WaitTimeout, wait_until
+
+PAGINATION_MAX_PAGES = int(os.getenv("PAGINATION_MAX_PAGES", "500"))
+PAGINATION_MAX_ITEMS = int(os.getenv("PAGINATION_MAX_ITEMS", "20000"))
+# Pages in a row that may load without adding items before we give up
+PAGINATION_STALL_LIMIT = int(os.getenv("PAGINATION_STALL_LIMIT", "3"))
+PAGINATION_SETTLE_TIMEOUT = float(os.getenv("PAGINATION_SETTLE_TIMEOUT", "10"))
+
+COUNT_ITEMS_SCRIPT = "return document.querySelectorAll(arguments[0]).length;"
+
+
+class PaginationStats:
+    def __init__(self):
+        self.pages = 0
+        self.items = 0
+        self.stalls = 0
+        self.stop_reason = None
+        self.started_at = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def items_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.items / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "pages": self.pages,
+            "items": self.items,
+            "stalls": self.stalls,
+            "elapsed": round(self.elapsed, 2),
+            "items_per_second": round(self.items_per_second, 2),
+            "stop_reason": self.stop_reason,
+        }
+
+
+def print_progress(stats: PaginationStats):
+    print(
+        f"Page {stats.pages}: {stats.items} items, "
+        f"{stats.items_per_second:.1f} items/s"
+    )
+
+
+class Paginator:
+    """Loads a "Show more" list page by page until it ends, stalls or hits a limit.
+
+    Iterating yields the stats after every page so callers can process new items
+    as they arrive; ``run()`` just drains it.
+    """
+
+    def __init__(
+        self,
+        driver,
+        item_selector,
+        load_more,
+        max_pages=PAGINATION_MAX_PAGES,
+        max_items=PAGINATION_MAX_ITEMS,
+        stall_limit=PAGINATION_STALL_LIMIT,
+        settle_timeout=PAGINATION_SETTLE_TIMEOUT,
+        on_progress=print_progress,
+    ):
+        self.driver = driver
+        self.item_selector = item_selector
+        self.load_more = load_more
+        self.max_pages = max_pages
+        self.max_items = max_items
+        self.stall_limit = stall_limit
+        self.settle_timeout = settle_timeout
+        self.on_progress = on_progress
+        self.stats = PaginationStats()
+
+    def count_items(self) -> int:
+        return self.driver.execute_script(COUNT_ITEMS_SCRIPT, self.item_selector)
+
+    def __iter__(self):
+        stats = self.stats
+        stats.items = self.count_items()
+        yield stats
+        while True:
+            if stats.items >= self.max_items:
+                stats.stop_reason = "max_items"
+                break
+            if stats.pages >= self.max_pages:
+                stats.stop_reason = "max_pages"
+                break
+
+            before = stats.items
+            more_available = self.load_more(self.driver)
+            try:
+                wait_until(
+                    self.driver,
+                    lambda driver: self.count_items() > before,
+                    timeout=self.settle_timeout,
+                )
+            except WaitTimeout:
+                pass
+            stats.items = self.count_items()
+            stats.pages += 1
+
+            if stats.items > before:
+                stats.stalls = 0
+            elif not more_available:
+                stats.stop_reason = "exhausted"
+                break
+            else:
+                stats.stalls += 1
+                if stats.stalls >= self.stall_limit:
+                    stats.stop_reason = "stalled"
+                    break
+
+            if self.on_progress:
+                self.on_progress(stats)
+            yield stats
+
+        if self.on_progress:
+            self.on_progress(stats)
+
+    def run(self) -> PaginationStats:
+        for _ in self:
+            pass
+        return self.stats
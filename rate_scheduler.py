@@ -0,0 +1,179 @@
+import threading
+import time
+
+from pymongo.errors import DuplicateKeyError
+
+from database import get_rate_buckets_collection
+
+ACTION_CONNECT = "connect"
+ACTION_FOLLOW = "follow"
+ACTION_LIKE = "like"
+ACTION_MESSAGE = "message"
+
+# Per LinkedIn account; each window is its own token bucket and both must allow the action
+ACTION_LIMITS = {
+    ACTION_CONNECT: {"hourly": 15, "daily": 80},
+    ACTION_FOLLOW: {"hourly": 30, "daily": 150},
+    ACTION_LIKE: {"hourly": 40, "daily": 200},
+    ACTION_MESSAGE: {"hourly": 20, "daily": 100},
+}
+
+_WINDOW_SECONDS = {"hourly": 3600, "daily": 86400}
+
+
+class RateLimited(Exception):
+    def __init__(self, account, action, retry_after):
+        self.account = account
+        self.action = action
+        self.retry_after = retry_after
+        super().__init__(
+            f"{action} limit reached for {account}, retry in {int(retry_after)} seconds"
+        )
+
+
+class TokenBucket:
+    def __init__(self, capacity, window_seconds, tokens=None):
+        self.capacity = capacity
+        self.rate = capacity / window_seconds
+        self.tokens = float(capacity if tokens is None else tokens)
+
+    def refill(self, elapsed):
+        self.tokens = min(self.capacity, self.tokens + max(elapsed, 0) * self.rate)
+
+    def wait_time(self) -> float:
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class RateScheduler:
+    """Token buckets per (account, action), kept in Mongo so restarts do not refill them.
+
+    Each bucket document carries a version; a take only lands if nobody else wrote the
+    document since it was read, and is retried otherwise.
+    """
+
+    def __init__(self, limits=ACTION_LIMITS, collection=None):
+        self.limits = limits
+        self._collection = collection
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            self._collection = get_rate_buckets_collection()
+        return self._collection
+
+    def _windows(self, action):
+        try:
+            return self.limits[action]
+        except KeyError:
+            raise ValueError(f"Unknown action type: {action}")
+
+    def _read(self, key):
+        return self.collection.find_one({"_id": key})
+
+    def _write(self, doc, new) -> bool:
+        """Store ``new`` unless the bucket changed since ``doc`` was read."""
+        if doc is None:
+            try:
+                self.collection.insert_one(new)
+            except DuplicateKeyError:
+                return False
+            return True
+        result = self.collection.update_one(
+            {"_id": doc["_id"], "version": doc.get("version")},
+            {
+                "$set": {"tokens": new["tokens"], "updated_at": new["updated_at"]},
+                "$inc": {"version": 1},
+            },
+        )
+        return result.modified_count == 1
+
+    def _load(self, account, action, now):
+        """The stored document (None if there is none yet) and its buckets refilled to ``now``."""
+        windows = self._windows(action)
+        doc = self._read(f"{account}:{action}")
+        stored = (doc or {}).get("tokens") or {}
+        elapsed = now - doc["updated_at"] if doc else 0
+        buckets = {}
+        for window, capacity in windows.items():
+            bucket = TokenBucket(capacity, _WINDOW_SECONDS[window], stored.get(window))
+            bucket.refill(elapsed)
+            buckets[window] = bucket
+        return doc, buckets
+
+    def _store(self, account, action, doc, buckets, now) -> bool:
+        return self._write(
+            doc,
+            {
+                "_id": f"{account}:{action}",
+                "account": account,
+                "action": action,
+                "tokens": {window: bucket.tokens for window, bucket in buckets.items()},
+                "updated_at": now,
+                "version": (doc or {}).get("version", 0) + 1,
+            },
+        )
+
+    def wait_time(self, account, action) -> float:
+        """Seconds until ``account`` may perform ``action``; 0 means a slot is free now."""
+        _, buckets = self._load(account, action, time.time())
+        return max(b.wait_time() for b in buckets.values())
+
+    def try_acquire(self, account, action) -> float:
+        while True:
+            now = time.time()
+            doc, buckets = self._load(account, action, now)
+            wait = max(b.wait_time() for b in buckets.values())
+            if wait > 0:
+                return wait
+            for bucket in buckets.values():
+                bucket.take()
+            if self._store(account, action, doc, buckets, now):
+                return 0.0
+
+    def acquire(self, account, action, max_wait=0):
+        while True:
+            wait = self.try_acquire(account, action)
+            if wait == 0:
+                return
+            if wait > max_wait:
+                raise RateLimited(account, action, wait)
+            time.sleep(wait)
+            max_wait -= wait
+
+    def remaining(self, account) -> dict:
+        now = time.time()
+        result = {}
+        for action in self.limits:
+            _, buckets = self._load(account, action, now)
+            result[action] = int(min(bucket.tokens for bucket in buckets.values()))
+        return result
+
+
+class LocalRateScheduler(RateScheduler):
+    """Buckets held in this process only, for benchmarks that must not touch the app's Mongo."""
+
+    def __init__(self, limits=ACTION_LIMITS):
+        super().__init__(limits)
+        self._docs = {}
+        self._lock = threading.Lock()
+
+    def _read(self, key):
+        with self._lock:
+            doc = self._docs.get(key)
+            return dict(doc) if doc else None
+
+    def _write(self, doc, new) -> bool:
+        with self._lock:
+            current = self._docs.get(new["_id"])
+            if (current or {}).get("version") != (doc or {}).get("version"):
+                return False
+            self._docs[new["_id"]] = new
+            return True
+
+
+rate_scheduler = RateScheduler()
@@ -0,0 +1,65 @@
+import datetime
+import os
+
+from database import get_sessions_collection
+
+SESSION_TTL_HOURS = int(os.getenv("LINKEDIN_SESSION_TTL_HOURS", "72"))
+
+# Landing on any of these after opening the feed means the session is gone
+LOGGED_OUT_URL_MARKERS = ("session_redirect", "/login", "/authwall", "/checkpoint")
+
+
+def is_logged_in_url(url: str) -> bool:
+    return "linkedin.com" in url and not any(
+        marker in url for marker in LOGGED_OUT_URL_MARKERS
+    )
+
+
+class SessionStore:
+    def __init__(self, collection=None, ttl_hours=SESSION_TTL_HOURS):
+        self._collection = collection
+        self.ttl = datetime.timedelta(hours=ttl_hours)
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            self._collection = get_sessions_collection()
+        return self._collection
+
+    def _expires_at(self, cookies, now):
+        expires_at = now + self.ttl
+        for cookie in cookies:
+            # li_at is LinkedIn's auth cookie; the session dies with it
+            if cookie.get("name") == "li_at" and cookie.get("expiry"):
+                cookie_expiry = datetime.datetime.fromtimestamp(
+                    cookie["expiry"], datetime.timezone.utc
+                )
+                expires_at = min(expires_at, cookie_expiry)
+        return expires_at
+
+    def load(self, email):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        session = self.collection.find_one(
+            {"email": email, "expires_at": {"$gt": now}}, {"cookies": 1}
+        )
+        return session["cookies"] if session else None
+
+    def save(self, email, cookies):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        self.collection.update_one(
+            {"email": email},
+            {
+                "$set": {
+                    "cookies": cookies,
+                    "updated_at": now,
+                    "expires_at": self._expires_at(cookies, now),
+                }
+            },
+            upsert=True,
+        )
+
+    def invalidate(self, email):
+        self.collection.delete_one({"email": email})
+
+
+session_store = SessionStore()
@@ -0,0 +1,159 @@
+import argparse
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import stripe
+from bson import ObjectId
+
+from database import get_user_collection
+from job_queue import JobQueue, default_worker_id
+
+# stripe_id of a user whose Stripe customer the outbox has not created yet
+STRIPE_PENDING = "pending"
+JOB_CREATE_CUSTOMER = "create_customer"
+
+# Jobs leased per poll and Stripe calls in flight at once; 0 concurrency leaves the
+# outbox to `python -m stripe_outbox` running elsewhere
+STRIPE_OUTBOX_BATCH = int(os.getenv("STRIPE_OUTBOX_BATCH", "20"))
+STRIPE_OUTBOX_CONCURRENCY = int(os.getenv("STRIPE_OUTBOX_CONCURRENCY", "4"))
+STRIPE_OUTBOX_POLL = float(os.getenv("STRIPE_OUTBOX_POLL", "2"))
+# e.g. http://127.0.0.1:12111 for benchmarks/stripe_stub.py
+STRIPE_API_BASE = os.getenv("STRIPE_API_BASE")
+
+# Retrying these cannot succeed; everything else (network, 429, 5xx) is retried with backoff
+PERMANENT_ERRORS = (
+    stripe.error.AuthenticationError,
+    stripe.error.InvalidRequestError,
+    stripe.error.PermissionError,
+)
+
+stripe_queue = JobQueue("stripe")
+
+
+def customer_idempotency_key(user_id) -> str:
+    # Shared by the outbox and inline creation, so Stripe never makes two customers per user
+    return f"create-customer-{user_id}"
+
+
+class StripeOutbox:
+    """Creates the Stripe customers of newly registered users off the request path."""
+
+    def __init__(
+        self,
+        queue=stripe_queue,
+        batch_size=STRIPE_OUTBOX_BATCH,
+        concurrency=STRIPE_OUTBOX_CONCURRENCY,
+        poll_interval=STRIPE_OUTBOX_POLL,
+    ):
+        self.queue = queue
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.worker_id = f"{default_worker_id()}:stripe"
+        self._stop = threading.Event()
+        self._thread = None
+        self._executor = None
+
+    def enqueue_customer(self, user_id, email, name) -> str:
+        return self.queue.enqueue(
+            JOB_CREATE_CUSTOMER, {"user_id": str(user_id), "email": email, "name": name}
+        )
+
+    def create_customer(self, user_id, email, name) -> str:
+        """Create (or, on a retry, fetch back) the customer and store its id on the user."""
+        customer = stripe.Customer.create(
+            email=email,
+            name=name,
+            metadata={"user_id": str(user_id)},
+            idempotency_key=customer_idempotency_key(user_id),
+        )
+        get_user_collection().update_one(
+            {"_id": ObjectId(user_id), "stripe_id": STRIPE_PENDING},
+            {"$set": {"stripe_id": customer.id}},
+        )
+        return customer.id
+
+    def ensure_customer(self, user) -> str:
+        """Stripe customer id of ``user``, creating it now if the outbox has not yet."""
+        customer_id = user.get("stripe_id")
+        if customer_id != STRIPE_PENDING:
+            return customer_id
+        return self.create_customer(
+            user["_id"], user["email"], user.get("full_name") or user["first_name"]
+        )
+
+    def _process(self, job):
+        try:
+            customer_id = self.create_customer(**job["payload"])
+        except Exception as e:
+            status = self.queue.fail(job, e, retry=not isinstance(e, PERMANENT_ERRORS))
+            print(f"Stripe customer for {job['payload']['email']} failed ({status or 'lease lost'}): {e}")
+            return False
+        self.queue.complete(job, {"customer_id": customer_id})
+        return True
+
+    def run_once(self) -> int:
+        """Lease up to one batch of jobs and work through them; returns how many were leased."""
+        jobs = []
+        while len(jobs) < self.batch_size:
+            job = self.queue.lease(self.worker_id)
+            if job is None:
+                break
+            jobs.append(job)
+        if jobs:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(self.concurrency, 1), thread_name_prefix="stripe-outbox"
+                )
+            list(self._executor.map(self._process, jobs))
+        return len(jobs)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                leased = self.run_once()
+            except Exception as e:
+                print(f"Stripe outbox poll failed: {e}")
+                leased = 0
+            # A full batch means there is probably more waiting
+            if leased < self.batch_size:
+                self._stop.wait(self.poll_interval)
+
+    def start(self):
+        if self.concurrency <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stripe-outbox", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+stripe_outbox = StripeOutbox()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create pending Stripe customers")
+    parser.add_argument("--concurrency", type=int, default=max(STRIPE_OUTBOX_CONCURRENCY, 1))
+    args = parser.parse_args()
+
+    if STRIPE_API_BASE:
+        stripe.api_base = STRIPE_API_BASE
+    stripe.api_key = os.getenv("STRIPE_API_KEY", stripe.api_key)
+    outbox = StripeOutbox(concurrency=args.concurrency)
+    try:
+        outbox._run()
+    except KeyboardInterrupt:
+        outbox.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+import pytest
+
+from database import ensure_indexes, missing_indexes
+
+mongomock = pytest.importorskip("mongomock")
+
+
+def test_index_with_other_options_is_rebuilt():
+    database = mongomock.MongoClient().db
+    # OTP email index from before it was made unique
+    database.OTP.create_index("email")
+    assert ("OTP", [("email", 1)]) in missing_indexes(database)
+
+    assert ("OTP", [("email", 1)]) not in ensure_indexes(database)
+    assert database.OTP.index_information()["email_1"].get("unique") is True
+
+
+def test_registry_covers_queue_and_session_indexes():
+    database = mongomock.MongoClient().db
+    ensure_indexes(database)
+    assert database.linkedin_sessions.index_information()["expires_at_1"]["expireAfterSeconds"] == 0
+    assert "queue_1_status_1_lease_expires_at_1" in database.jobs.index_information()
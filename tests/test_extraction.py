@@ -0,0 +1,50 @@
+import pytest
+
+from automation_functions import (
+    EXTRACTION_HTML,
+    EXTRACTION_JSON,
+    ConnectionSync,
+    IncompleteCard,
+)
+
+COMPLETE_HTML = (
+    '<li><span class="mn-connection-card__name">Ada</span>'
+    '<a class="mn-connection-card__link" href="/in/ada">Ada</a></li>'
+)
+# The profile link is missing, e.g. a card LinkedIn had not finished rendering
+INCOMPLETE_HTML = '<li><span class="mn-connection-card__name">Bob</span></li>'
+
+
+class ScriptDriver:
+    def __init__(self, result):
+        self.result = result
+
+    def execute_script(self, script, *args):
+        return self.result
+
+
+def _sync(mode, result):
+    sync = object.__new__(ConnectionSync)
+    sync.driver = ScriptDriver(result)
+    sync.extraction_mode = mode
+    return sync
+
+
+@pytest.mark.parametrize(
+    "mode, complete, incomplete",
+    [
+        (EXTRACTION_HTML, COMPLETE_HTML, INCOMPLETE_HTML),
+        (
+            EXTRACTION_JSON,
+            {"name": "Ada", "profile_link": "/in/ada"},
+            {"name": "Bob", "profile_link": None},
+        ),
+    ],
+)
+def test_both_modes_reject_an_incomplete_card(mode, complete, incomplete):
+    contacts, cursor = _sync(mode, [complete])._extract_cards("list", "connections")
+    assert contacts == [{"name": "Ada", "profile_link": "https://www.linkedin.com/in/ada"}]
+    assert cursor == 1
+
+    with pytest.raises(IncompleteCard):
+        _sync(mode, [complete, incomplete])._extract_cards("list", "connections")
@@ -0,0 +1,59 @@
+import datetime
+
+import pytest
+
+from job_queue import JobQueue, JobStatus
+
+mongomock = pytest.importorskip("mongomock")
+
+
+def _expire_leases(collection):
+    past = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=1)
+    collection.update_many({}, {"$set": {"lease_expires_at": past}})
+
+
+@pytest.fixture
+def queue():
+    return JobQueue("test", collection=mongomock.MongoClient().db.jobs, lease_seconds=60)
+
+
+def test_single_attempt_job_with_expired_lease_goes_dead(queue):
+    # e.g. an engage job whose worker died after sending the message
+    job_id = queue.enqueue("engage", {"account": "a@example.com"}, max_attempts=1)
+    leased = queue.lease("worker-1")
+    assert leased["attempts"] == 1
+
+    _expire_leases(queue.collection)
+
+    assert queue.lease("worker-2") is None
+    job = queue.get(job_id)
+    assert job["status"] == JobStatus.DEAD
+    assert job["attempts"] == 1
+    # The crashed worker coming back cannot mark it done either
+    assert queue.complete(leased, "sent") is False
+
+
+def test_expired_lease_is_reclaimed_while_attempts_remain(queue):
+    queue.enqueue("connect", {"account": "a@example.com"}, max_attempts=2)
+    first = queue.lease("worker-1")
+    _expire_leases(queue.collection)
+
+    second = queue.lease("worker-2")
+    assert second["attempts"] == 2
+    assert second["lease_token"] != first["lease_token"]
+    assert queue.complete(first, "stale") is False
+    assert queue.complete(second, "sent") is True
+    assert queue.get(str(second["_id"]))["result"] == "sent"
+
+
+def test_status_only_counts_the_owners_jobs(queue):
+    queue.enqueue_many(
+        "connect",
+        [
+            {"profile_url": "p1", "owner": "a@example.com"},
+            {"profile_url": "p2", "owner": "b@example.com"},
+        ],
+        batch_id="run-1",
+    )
+    assert queue.status("run-1", owner="a@example.com")[JobStatus.QUEUED] == 1
+    assert queue.status("run-1", owner="c@example.com")[JobStatus.QUEUED] == 0
@@ -0,0 +1,53 @@
+import pytest
+
+from rate_scheduler import ACTION_CONNECT, LocalRateScheduler, RateLimited, RateScheduler
+
+mongomock = pytest.importorskip("mongomock")
+
+LIMITS = {ACTION_CONNECT: {"hourly": 2, "daily": 3}}
+
+
+def test_spent_tokens_survive_a_new_scheduler():
+    collection = mongomock.MongoClient().db.rate_buckets
+    scheduler = RateScheduler(LIMITS, collection=collection)
+    scheduler.acquire("a@example.com", ACTION_CONNECT)
+    scheduler.acquire("a@example.com", ACTION_CONNECT)
+
+    # e.g. the worker process was restarted
+    restarted = RateScheduler(LIMITS, collection=collection)
+    assert restarted.wait_time("a@example.com", ACTION_CONNECT) > 0
+    with pytest.raises(RateLimited):
+        restarted.acquire("a@example.com", ACTION_CONNECT)
+    assert restarted.remaining("b@example.com") == {ACTION_CONNECT: 2}
+
+
+def test_concurrent_write_is_retried_not_lost():
+    collection = mongomock.MongoClient().db.rate_buckets
+    scheduler = RateScheduler(LIMITS, collection=collection)
+    scheduler.acquire("a@example.com", ACTION_CONNECT)
+    other = RateScheduler(LIMITS, collection=collection)
+
+    load = scheduler._load
+    calls = []
+
+    def racing_load(account, action, now):
+        loaded = load(account, action, now)
+        if not calls:
+            # Another process takes a token between this read and the write
+            other.acquire(account, action)
+        calls.append(now)
+        return loaded
+
+    scheduler._load = racing_load
+    with pytest.raises(RateLimited):
+        scheduler.acquire("a@example.com", ACTION_CONNECT)
+    assert len(calls) == 2
+
+
+def test_local_scheduler_keeps_buckets_in_process():
+    scheduler = LocalRateScheduler(LIMITS)
+    scheduler._collection = object()  # Any Mongo access would raise AttributeError
+    scheduler.acquire("a@example.com", ACTION_CONNECT)
+    scheduler.acquire("a@example.com", ACTION_CONNECT)
+    with pytest.raises(RateLimited):
+        scheduler.acquire("a@example.com", ACTION_CONNECT)
@@ -0,0 +1,25 @@
+import hashlib
+import os
+
+from ttl_cache import TTLCache
+
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+# Upper bound on how long a verified token is trusted without re-checking its signature
+JWT_CACHE_MAX_TTL = int(os.getenv("JWT_CACHE_MAX_TTL", "300"))
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class TokenCache(TTLCache):
+    """LRU of verified tokens keyed by digest; an entry lives until its token's exp."""
+
+    def __init__(self, max_size=JWT_CACHE_SIZE, max_ttl=JWT_CACHE_MAX_TTL):
+        super().__init__(max_size=max_size, ttl=max_ttl)
+
+    def _key(self, token):
+        return token_digest(token)
+
+
+token_cache = TokenCache()
@@ -1,32 +1,55 @@
+import asyncio
 import csv
 import datetime
-from datetime import timedelta
+import json
+from typing import Optional
 
-import pytz
 import stripe
 from authentication import authenticate_user, create_access_token, get_current_user
 
 from automation_functions import (
-    ConnectionRequest,
-    ConnectionSync,
-    FollowRequest,
-    FollowSync,
+    JOB_CONNECT,
+    JOB_ENGAGE,
+    JOB_FETCH_METRICS,
+    JOB_FOLLOW,
+    JOB_FOLLOW_PROFILE,
     process_csv_and_queue_requests,
+    resume_batch_run,
+    start_batch_run,
+    submit_job,
 )
+from batch_runs import batch_runs
 from bson import ObjectId
 from constants import ERROR_MESSAGES, ERROR_MESSAGES_LINKEDIN, RESPONSE_MESSAGES
+from database import ensure_indexes as ensure_collection_indexes
 from database import (
+    get_async_contacts_collection,
+    get_async_db,
+    get_async_user_collection,
+    get_async_user_profilecollection,
     get_contacts_collection,
-    get_db,
-    get_otp_collection,
     get_user_collection,
     get_user_profilecollection,
 )
-from fastapi import Depends, FastAPI, File, HTTPException, UploadFile, status
+from entitlements import (
+    STRIPE_WEBHOOK_SECRET,
+    apply_stripe_event,
+    get_plan,
+    has_active_plan,
+    invalidate_entitlement,
+)
+from fastapi import Depends, FastAPI, File, HTTPException, Request, UploadFile, status
 from fastapi.responses import JSONResponse
-from functions import generate_otp, get_user_profile
-from passlib.context import CryptContext
-from pymongo.collection import Collection
+from functions import (
+    consume_otp,
+    generate_otp,
+    get_user_profile,
+    invalidate_user_profile,
+    store_otp,
+)
+from job_queue import linkedin_queue
+from password_hashing import PasswordHasherBusy, password_hasher
+from stripe_outbox import STRIPE_API_BASE, STRIPE_PENDING, stripe_outbox
 
 from models import (
     InitiateUserLoginModel,
@@ -49,12 +72,41 @@ from models import (
 
 app = FastAPI()
 
+
+@app.on_event("startup")
+def ensure_indexes():
+    ensure_collection_indexes()
+
+
+@app.on_event("shutdown")
+def shutdown_password_hasher():
+    password_hasher.shutdown()
+
+
+@app.on_event("startup")
+def start_stripe_outbox():
+    stripe_outbox.start()
+
+
+@app.on_event("shutdown")
+def stop_stripe_outbox():
+    stripe_outbox.stop()
+
+
 stripe.api_key= "API_key"
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+if STRIPE_API_BASE:
+    stripe.api_base = STRIPE_API_BASE
 
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def get_password_hash(password):
+    try:
+        return await password_hasher.hash(password)
+    except PasswordHasherBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many requests, please retry",
+            headers={"Retry-After": str(e.retry_after)},
+        )
 
 
 @app.post(
@@ -62,31 +114,22 @@ def get_password_hash(password):
     response_model=ResponseBaseModel,
     description="The API is to Register a New User",
 )
-def registeruser(body: UserRegisterModel):
-    user = get_user_collection()
+async def registeruser(body: UserRegisterModel):
+    user = get_async_user_collection()
 
-    if user.find_one({"email": body.email}):
+    if await user.find_one({"email": body.email}):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=ERROR_MESSAGES["EMAIL_ALREADY_REGISTERED"],
         )
-    hashed_password = get_password_hash(body.password)
+    hashed_password = await get_password_hash(body.password)
     full_name = f"{body.first_name} {body.last_name}"
     createdat = str(datetime.datetime.now())
     lastupdatedat = str(datetime.datetime.now())
 
-    try:
-        customer = stripe.Customer.create(
-            email=body.email,
-            name=full_name,
-        )
-    except stripe.error.StripeError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Stripe error: {str(e)}"
-        )
-
     new_user = UserRegisterModel(
-        stripe_id=customer.id,
+        # The Stripe outbox creates the customer and swaps in its id
+        stripe_id=STRIPE_PENDING,
         first_name=body.first_name,
         last_name=body.last_name,
         full_name=full_name,
@@ -103,16 +146,21 @@ def registeruser(body: UserRegisterModel):
             planId=None, seats=0, subscription_id=None, is_subscribed=False
         ),
     )
-    result = user.insert_one(new_user.dict())
+    result = await user.insert_one(new_user.dict())
     inserted_id = str(result.inserted_id)
     print(inserted_id)
+    await asyncio.to_thread(
+        stripe_outbox.enqueue_customer, inserted_id, body.email, full_name
+    )
     return ResponseBaseModel(data=None, message=ERROR_MESSAGES["REGISTRATION_SUCCESS"])
 
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc: HTTPException):
     response = ResponseBaseModel(data=RESPONSE_MESSAGES["data"], message=exc.detail)
-    return JSONResponse(status_code=exc.status_code, content=response.dict())
+    return JSONResponse(
+        status_code=exc.status_code, content=response.dict(), headers=exc.headers
+    )
 
 
 # --Initiate Login API endpoint------
@@ -121,32 +169,15 @@ async def http_exception_handler(request, exc: HTTPException):
     response_model=ResponseBaseModel,
     description="The API is to Initiate Login by sending OTP to the registered EmailID",
 )
-def initiate_login(login: InitiateUserLoginModel):
+async def initiate_login(login: InitiateUserLoginModel):
 
-    otp_collection = get_otp_collection()
-
-    user = authenticate_user(login.email, login.password)
+    # bcrypt runs on the password hasher's own threads, not the request threadpool
+    user = await authenticate_user(login.email, login.password)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
-    otp_collection.delete_one({"email": login.email})
-
-    otp = generate_otp()
-    ist = pytz.timezone("Asia/Kolkata")
-    current_time = datetime.datetime.now(ist)
-    valid_till = current_time + timedelta(minutes=5)
-    valid_till_naive = valid_till.replace(tzinfo=None)
-    valid_till_str = valid_till_naive.isoformat()
-
-    # Store OTP in the database
-    otp_document = {
-        "user_id": str(user["_id"]),
-        "OTP": otp,
-        "method": "email",
-        "valid_till": valid_till_str,
-        "email": login.email,
-    }
-    otp_collection.insert_one(otp_document)
+    # Store OTP in the database, replacing any earlier one in the same round trip
+    await asyncio.to_thread(store_otp, user, login.email, generate_otp())
 
     return ResponseBaseModel(
         data={"method": "email", "email_id": login.email},
@@ -162,41 +193,21 @@ def initiate_login(login: InitiateUserLoginModel):
     description="The API is to Login User using OTP",
 )
 def login(login: LoginUsingOTPModel):
-    ist = pytz.timezone("Asia/Kolkata")
-    otp_collection = get_otp_collection()
     user_collection = get_user_collection()
 
-    otp_document = otp_collection.find_one({"email": login.email})
-    user = user_collection.find_one({"email": login.email})
+    # Matches code and expiry and consumes the OTP in one atomic call
+    if not consume_otp(login.email, login.OTP):
+        raise HTTPException(status_code=401, detail="Invalid or expired OTP")
 
+    user = user_collection.find_one({"email": login.email})
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
-    if not otp_document or otp_document["OTP"] != login.OTP:
-        raise HTTPException(status_code=401, detail="Invalid OTP")
-
-    # Convert `valid_till` from string to datetime object for comparison
-    valid_till = datetime.datetime.fromisoformat(otp_document["valid_till"])
-    valid_till = ist.localize(valid_till)
-    # Get the current time in UTC to compare with `valid_till`
-    current_time = datetime.datetime.now(ist)
-
-    if current_time > valid_till:
-        raise HTTPException(status_code=401, detail="Invalid or expired OTP")
-
     token = create_access_token(user_id=str(user["_id"]), email=str(user["email"]))
-    profile = get_user_profile(user["_id"])
+    profile = get_user_profile(user)
 
     return ResponseBaseModel(
-        data={
-            "access_token": token,
-            "profile": {
-                "avatar": profile.get("avatar", ""),
-                "full_name": profile.get(
-                    "full_name", f"{user['first_name']} {user.get('last_name', '')}"
-                ),
-            },
-        },
+        data={"access_token": token, "profile": profile},
         message="Login is successful",
     )
 
@@ -211,10 +222,10 @@ def login(login: LoginUsingOTPModel):
 async def create_trial_subscription(
     body: SubscriptionModel, token: Token = Depends(get_current_user)
 ):
-    user_collection = get_user_collection()
+    user_collection = get_async_user_collection()
     email = token.email
     # Fetch the user from the database using their email
-    user = user_collection.find_one({"email": email})
+    user = await user_collection.find_one({"email": email})
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -226,8 +237,11 @@ async def create_trial_subscription(
         )
 
     try:
+        # Users registered moments ago may still be waiting on the outbox
+        customer_id = await asyncio.to_thread(stripe_outbox.ensure_customer, user)
         # Create a subscription with a 15-day free trial, without requiring a payment method
-        subscription = stripe.Subscription.create(
+        subscription = await asyncio.to_thread(
+            stripe.Subscription.create,
             customer=customer_id,
             items=[
                 {
@@ -239,7 +253,7 @@ async def create_trial_subscription(
         )
 
         # Update the user's current plan in the database
-        user_collection.update_one(
+        await user_collection.update_one(
             {"email": email},
             {
                 "$set": {
@@ -251,6 +265,7 @@ async def create_trial_subscription(
                 }
             },
         )
+        invalidate_entitlement(email)
 
         return {
             "message": "Trial subscription created successfully",
@@ -272,11 +287,11 @@ async def create_trial_subscription(
 async def create_checkout_session(
     body: SubscriptionModel, token: Token = Depends(get_current_user)
 ):
-    user_collection = get_user_collection()
+    user_collection = get_async_user_collection()
 
     email = token.email
 
-    user = user_collection.find_one({"email": email})
+    user = await user_collection.find_one({"email": email})
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -289,8 +304,11 @@ async def create_checkout_session(
         )
 
     try:
+        # Users registered moments ago may still be waiting on the outbox
+        customer_id = await asyncio.to_thread(stripe_outbox.ensure_customer, user)
         # Create a checkout session for the selected plan
-        checkout_session = stripe.checkout.Session.create(
+        checkout_session = await asyncio.to_thread(
+            stripe.checkout.Session.create,
             customer=customer_id,
             payment_method_types=["card"],
             line_items=[
@@ -300,26 +318,45 @@ async def create_checkout_session(
                 },
             ],
             mode="subscription",
+            # Read back by /stripe/webhook, which marks the plan paid once Stripe says so
+            metadata={"planId": body.planId},
+            subscription_data={"metadata": {"planId": body.planId}},
             success_url="http://localhost:8000/success?session_id={CHECKOUT_SESSION_ID}",
             cancel_url="http://localhost:8000/cancel",
         )
 
-        user_collection.update_one(
-            {"email": email},
-            {
-                "$set": {
-                    "currentPlan.planId": body.planId,
-                    "currentPlan.is_subscribed": True,
-                }
-            },
-        )
-
         return {"checkout_url": checkout_session.url}
 
     except stripe.error.StripeError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.post(
+    "/stripe/webhook",
+    description="Receives Stripe subscription events and applies them to the user's plan",
+)
+async def stripe_webhook(request: Request):
+    if not STRIPE_WEBHOOK_SECRET:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Stripe webhook secret is not configured",
+        )
+    payload = await request.body()
+    try:
+        # Rejects signatures older than 5 minutes, so a captured event cannot be replayed
+        stripe.WebhookSignature.verify_header(
+            payload.decode("utf-8"),
+            request.headers.get("stripe-signature", ""),
+            STRIPE_WEBHOOK_SECRET,
+            tolerance=stripe.Webhook.DEFAULT_TOLERANCE,
+        )
+        event = json.loads(payload)
+    except (ValueError, stripe.error.SignatureVerificationError):
+        raise HTTPException(status_code=400, detail="Invalid Stripe webhook")
+    # Anything but an error response makes Stripe stop retrying, so unknown events are acked
+    return {"received": True, "result": await apply_stripe_event(event)}
+
+
 # ---Register Linkedin Profile
 
 
@@ -330,11 +367,11 @@ async def create_checkout_session(
 )
 def register_linkedin_profile(body: LinkedInRegisterModel):
 
-    user_collection = get_user_collection()
-    user = user_collection.find_one({"email": body.email})
+    # Cached currentPlan of the user, kept current by /stripe/webhook
+    plan = get_plan(body.email)
 
     # Check if the user exists
-    if user is None:
+    if plan is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found."
         )
@@ -346,7 +383,7 @@ def register_linkedin_profile(body: LinkedInRegisterModel):
             detail=ERROR_MESSAGES["EMAIL_ALREADY_REGISTERED"],
         )
 
-    if not user.get("currentPlan", {}).get("planId"):
+    if not has_active_plan(plan):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=ERROR_MESSAGES_LINKEDIN["EMAIL_NEEDTO_SUBSCRIBE"],
@@ -372,6 +409,7 @@ def register_linkedin_profile(body: LinkedInRegisterModel):
         {"$set": {"linkedin_profile": linkedin_profile.dict()}},
         upsert=True,
     )
+    invalidate_user_profile(body.email)
 
     return ResponseBaseModel(
         data=None, message="LinkedIn profile registered successfully."
@@ -408,37 +446,9 @@ def fetch_linkedin_metrics(body: LinkedInRegisterModel):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="LinkedIn username or password is missing.",
         )
-    sync = ConnectionSync()
-    # Log in to LinkedIn and fetch metrics using Selenium
-    # sync.login(username,password,cookies_location='cookies')
-    connection_collection = get_contacts_collection()
-
-    try:
-        contacts = sync.download(username, password)
-        connection_collection.insert_many(contacts)
-        connections_count = len(contacts)
-
-        following = sync.get_following()
-        following_count = len(following)
-
-        followers = sync.get_follower()
-        follower_count = len(followers)
-
-        # Update the connections count in the LinkedIn profile
-        profile_collection.update_one(
-            {"email": body.email},
-            {
-                "$set": {
-                    "linkedin_profile.metrics.connections": connections_count,
-                    "linkedin_profile.metrics.following": following_count,
-                    "linkedin_profile.metrics.followers": follower_count,
-                }
-            },
-        )
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    return {"status": "success", "message": "Metrics fetched and updated successfully."}
+    # The Selenium sync runs in a worker process; poll /jobs/{job_id} for progress
+    job_id = submit_job(JOB_FETCH_METRICS, {"owner": body.email, "account": username})
+    return {"status": "queued", "job_id": job_id}
 
 
 # ------To Like, message target person by passing their name
@@ -490,134 +500,75 @@ def get_target_user_from_db(
             detail="LinkedIn username or password is missing.",
         )
 
-    sync1 = ConnectionSync()
-    # sync=ConnectionRequest(profile_link)
-
-    # sync=ConnectionSync()
-    try:
-        # ----without adding celery
-
-        sync1.login(username, password, cookies_location="cookies")
-        sync1.like_all_posts(profile_link)
-
-        message = "Hey how are you"
-        sync1.send_message(profile_link, message)
-        print("message sent")
-
-        sync1.extract_info(profile_link)
-        profile_info = sync1.extract_info(profile_link)
-        print(profile_info)
-
-        # Optional: Update the profile information in MongoDB
-        connections_collection.update_one(
-            {"profile_link": profile_link},
-            {
-                "$set": {"headline": profile_info.get("headline")}
-            },  # Save the extracted info into the collection
-            upsert=True,  # If not found, create a new document
-        )
-
-
-        #---adding celery
-
-        # sync.login(username,password,cookies_location='cookies')
-        # #login_to_linkedin_task.apply_async(args=[username,password],kwargs={'cookies_location': 'cookies'})
-        # print(profile_link)
-        
-        # message_text="Hey how are you?"
-        # send_messages_task=send_message_task.apply_async(args=[profile_link, message_text],countdown=60)
-
-        # like_posts_task=like_post_task.apply_async(args=[profile_link],countdown=60)
-        # print("hii")
-        # connections_collection.update_one({"profileId": profile_link}, {"$set": {"status": "Session Active"}})
-
-        # return {"message": "Liking posts and sending message are scheduled in the background.", "task_id1": like_posts_task.id,"task_id2":send_messages_task.id}
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    
-
-#-------Check the status of the celery task
-
-# @app.get("/task-status/{task_id}")
-# def get_task_status(task_id:str):
-#     result = AsyncResult(task_id, app=celery_app)
-#     if result.ready():
-#         return {"status": result.status, "result": result.result}
-#     else:
-#         return {"status": result.status, "message": "Task not completed yet."}
-
-
-
-
-
+    # Messages must not go out twice, so this job is never retried
+    job_id = submit_job(
+        JOB_ENGAGE,
+        {
+            "owner": email,
+            "account": username,
+            "profile_url": profile_link,
+            "message": "Hey how are you",
+        },
+        max_attempts=1,
+    )
+    return {"status": "queued", "job_id": job_id}
 
 
 @app.post("/follow-profile")
 async def follow_profile(
     request: TargetProfileRequest, token: Token = Depends(get_current_user)
 ):
-    profiles_collection = get_user_profilecollection()
+    profiles_collection = get_async_user_profilecollection()
     contacts_collection = (
-        get_contacts_collection()
+        get_async_contacts_collection()
     )  # Assuming there's a collection for contacts
-    # sync = None  # Initialize sync variable
-
-    try:
-        # Fetch the profile from the contact database using the provided name
-        contact = contacts_collection.find_one(
-            {"name": request.name}
-        )  # Modify to use name from request
 
-        if not contact or "profile_link" not in contact:
-            raise HTTPException(
-                status_code=404, detail="Profile URL not found for the provided name"
-            )
+    # Fetch the profile from the contact database using the provided name
+    contact = await contacts_collection.find_one(
+        {"name": request.name}
+    )  # Modify to use name from request
 
-        profile_url = contact["profile_link"]  # Extract the profile URL
-
-        # Fetch LinkedIn credentials from the database
-        profile = profiles_collection.find_one(
-            {"linkedin_profile.username": {"$exists": True}}
+    if not contact or "profile_link" not in contact:
+        raise HTTPException(
+            status_code=404, detail="Profile URL not found for the provided name"
         )
-        if not profile:
-            raise HTTPException(
-                status_code=404, detail="Profile credentials not found in the database"
-            )
-
-        email = profile.get("linkedin_profile", {}).get("username")
-        password = profile.get("linkedin_profile", {}).get("password")
-
-        if not email or not password:
-            raise HTTPException(
-                status_code=400, detail="Email or password not found in the database"
-            )
 
-        sync = FollowSync(email=email, password=password)
+    profile_url = contact["profile_link"]  # Extract the profile URL
 
-        # Login to LinkedIn
-        sync.login_linkedin(email, password)
-
-        # Use the send function with the fetched profile URL
-        sync.send(profile_url)
+    # Fetch LinkedIn credentials from the database
+    profile = await profiles_collection.find_one(
+        {"linkedin_profile.username": {"$exists": True}}
+    )
+    if not profile:
+        raise HTTPException(
+            status_code=404, detail="Profile credentials not found in the database"
+        )
 
-        return {
-            "success": True,
-            "message": "Profile interaction completed successfully",
-        }
+    email = profile.get("linkedin_profile", {}).get("username")
+    password = profile.get("linkedin_profile", {}).get("password")
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    if not email or not password:
+        raise HTTPException(
+            status_code=400, detail="Email or password not found in the database"
+        )
 
-    finally:
-        if sync:
-            sync.close()
+    # Following the profile and its companies runs in a worker process
+    job_id = await asyncio.to_thread(
+        submit_job,
+        JOB_FOLLOW_PROFILE,
+        {"owner": token.email, "account": email, "profile_url": profile_url},
+    )
+    return {
+        "success": True,
+        "message": "Profile interaction queued",
+        "job_id": job_id,
+    }
 
 
 @app.post("/connections/upload-contacts/")
 async def upload_contacts(
     file: UploadFile = File(...),
-    db: Collection = Depends(get_db),
+    db=Depends(get_async_db),
     token: Token = Depends(get_current_user),
 ):
     if not file.filename.endswith(".csv"):
@@ -635,21 +586,21 @@ async def upload_contacts(
         contacts.append(item)
 
     if contacts:
-        db["connection"].delete_many({})
-        db["connection"].insert_many(contacts)  # Insert all contacts at once
+        await db["connection"].delete_many({})
+        await db["connection"].insert_many(contacts)  # Insert all contacts at once
 
     return {"message": "CSV file uploaded and data stored in MongoDB"}
 
 
 @app.post("/connections/send-follow-requests/")
 async def send_follow_requests(
-    db: Collection = Depends(get_db), token: Token = Depends(get_current_user)
+    db=Depends(get_async_db), token: Token = Depends(get_current_user)
 ):
     profile_collection = db["connection"]
-    profiles = profile_collection.find()
+    profiles = await profile_collection.find({}, {"profile_link": 1}).to_list(None)
 
     # Retrieve LinkedIn credentials from MongoDB or environment variables
-    profile = db["profiles"].find_one({"linkedin_profile.username": {"$exists": True}})
+    profile = await db["profiles"].find_one({"linkedin_profile.username": {"$exists": True}})
     if not profile:
         raise HTTPException(
             status_code=404, detail="Profile credentials not found in the database"
@@ -661,37 +612,26 @@ async def send_follow_requests(
     if not email or not password:
         raise HTTPException(status_code=400, detail="Incorrect Email or password ")
 
-    # Initialize FollowRequest class
-    sync = FollowRequest(email=email, password=password)
-
-    try:
-        sync.login_linkedin(email, password)  # Login to LinkedIn
-
-        for profile in profiles:
-            profile_url = profile.get("profile_link")
-            if profile_url:
-                try:
-                    # Send follow request for each profile
-                    sync.send(profile_url)
-                    print(f"Follow request sent to: {profile_url}")
-                except Exception as e:
-                    print(
-                        f"Failed to send follow request to: {profile_url}. Error: {str(e)}"
-                    )
-    finally:
-        sync.close()  # Close the browser after all requests are sent
+    # Each profile becomes a checkpointed job; the queue worker sends them in the background
+    run_id = await asyncio.to_thread(
+        start_batch_run,
+        JOB_FOLLOW,
+        [profile["profile_link"] for profile in profiles if profile.get("profile_link")],
+        account=email,
+        owner=token.email,
+    )
 
-    return {"message": "Follow requests sent to all profile links."}
+    return {"message": "Follow requests queued for all profile links.", "run_id": run_id}
 
 
 @app.post("/connections/send-connection-request")
 async def send_connection_request(
-    db: Collection = Depends(get_db), token: Token = Depends(get_current_user)
+    db=Depends(get_async_db), token: Token = Depends(get_current_user)
 ):
     profile_collection = db["connection"]
-    profiles = profile_collection.find()
+    profiles = await profile_collection.find({}, {"profile_link": 1}).to_list(None)
 
-    profile = db["profiles"].find_one({"linkedin_profile.username": {"$exists": True}})
+    profile = await db["profiles"].find_one({"linkedin_profile.username": {"$exists": True}})
     if not profile:
         raise HTTPException(
             status_code=404, detail="Profile credentials not found in the database"
@@ -702,24 +642,80 @@ async def send_connection_request(
 
     if not email or not password:
         raise HTTPException(status_code=404, detail="Invalid email or password")
-    sync = ConnectionRequest(email=email, password=password)
+    run_id = await asyncio.to_thread(
+        start_batch_run,
+        JOB_CONNECT,
+        [profile["profile_link"] for profile in profiles if profile.get("profile_link")],
+        account=email,
+        owner=token.email,
+    )
 
-    try:
-        sync.login_linkedin(email, password)
-        for profile in profiles:
-            profile_url = profile.get("profile_link")
-            if profile_url:
-                try:
-                    sync.send(profile_url)
-                    print(f"connection request has been sent to:{profile_url}")
+    return {
+        "meassage": "Connection requests have been queued for all the profiles",
+        "run_id": run_id,
+    }
 
-                except Exception as e:
-                    print(f"failed to send connection request to:{profile_url}.Error:{str(e)}")
 
-    finally:
-        sync.close()
+@app.get("/connections/runs/{run_id}")
+def get_batch_run(run_id: str, token: Token = Depends(get_current_user)):
+    run = batch_runs.get_run(run_id)
+    if run is None or run.get("owner") != token.email:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return {
+        "run_id": run_id,
+        "kind": run["kind"],
+        "total": run["total"],
+        "checkpoints": batch_runs.summary(run_id),
+        "queue": linkedin_queue.status(run_id),
+    }
 
-    return {"meassage": "Connection request has been sent to all the profiles"}
+
+@app.post("/connections/runs/{run_id}/resume")
+async def resume_run(run_id: str, token: Token = Depends(get_current_user)):
+    run = await asyncio.to_thread(batch_runs.get_run, run_id)
+    if run is None or run.get("owner") != token.email:
+        raise HTTPException(status_code=404, detail="Run not found")
+    requeued = await asyncio.to_thread(resume_batch_run, run_id)
+    if requeued is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return {"run_id": run_id, "requeued": requeued}
+
+
+@app.get("/connections/queue-status")
+def get_queue_status(batch_id: Optional[str] = None, token: Token = Depends(get_current_user)):
+    dead_letters = [
+        {
+            "job_id": str(job["_id"]),
+            "profile_url": job["payload"].get("profile_url"),
+            "attempts": job["attempts"],
+            "error": job.get("last_error"),
+        }
+        for job in linkedin_queue.dead_letters(batch_id, owner=token.email)
+    ]
+    return {
+        "batch_id": batch_id,
+        "counts": linkedin_queue.status(batch_id, owner=token.email),
+        "dead_letters": dead_letters,
+    }
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str, token: Token = Depends(get_current_user)):
+    job = linkedin_queue.get(job_id)
+    # Jobs queued before owners were recorded have none and are not shown to anyone
+    if job is None or job["payload"].get("owner") != token.email:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "job_id": job_id,
+        "type": job["type"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "progress": job.get("progress"),
+        "result": job.get("result"),
+        "error": job.get("last_error"),
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
 
 
 
@@ -727,14 +723,17 @@ async def send_connection_request(
 
 
 @app.post("/upload-csv/")
-async def upload_csv(file: UploadFile = File(...)):
+async def upload_csv(
+    file: UploadFile = File(...), token: Token = Depends(get_current_user)
+):
 
     if file.content_type != "text/csv":
         raise HTTPException(
             status_code=400, detail="Invalid file format. Please upload a CSV file."
         )
-    await process_csv_and_queue_requests(file)
+    run_id = await process_csv_and_queue_requests(file, owner=token.email)
     return {
-        "message": "File uploaded and connection requests are queued for processing."
+        "message": "File uploaded and connection requests are queued for processing.",
+        "run_id": run_id,
     }
 
@@ -0,0 +1,115 @@
+import os
+import random
+import threading
+import time
+
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    WebDriverException,
+)
+
+WAIT_TIMEOUT = float(os.getenv("WAIT_TIMEOUT", "20"))
+WAIT_POLL_INITIAL = 0.1
+WAIT_POLL_MAX = 1.0
+WAIT_POLL_BACKOFF = 1.5
+
+# Minimum gap between two page actions of the same account, kept separate from
+# page readiness so pacing is an explicit choice and not a side effect of sleeps
+PACING_MIN_INTERVAL = float(os.getenv("PACING_MIN_INTERVAL", "4"))
+PACING_JITTER = float(os.getenv("PACING_JITTER", "2"))
+
+_IGNORED_EXCEPTIONS = (NoSuchElementException, StaleElementReferenceException)
+
+
+class WaitTimeout(Exception):
+    pass
+
+
+def wait_until(
+    driver,
+    condition,
+    timeout=WAIT_TIMEOUT,
+    poll=WAIT_POLL_INITIAL,
+    max_poll=WAIT_POLL_MAX,
+    backoff=WAIT_POLL_BACKOFF,
+    message="",
+):
+    """Poll ``condition(driver)`` with growing intervals until it returns a truthy value."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            result = condition(driver)
+            if result:
+                return result
+        except _IGNORED_EXCEPTIONS:
+            pass
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise WaitTimeout(message or f"Condition not met within {timeout} seconds")
+        time.sleep(min(poll, remaining))
+        poll = min(poll * backoff, max_poll)
+
+
+def document_ready(driver):
+    try:
+        return driver.execute_script("return document.readyState;") == "complete"
+    except WebDriverException:
+        return False
+
+
+def wait_for_document_ready(driver, timeout=WAIT_TIMEOUT):
+    return wait_until(
+        driver, document_ready, timeout=timeout, message="Document never became ready"
+    )
+
+
+def element_present(by, value):
+    def _condition(driver):
+        elements = driver.find_elements(by, value)
+        return elements[0] if elements else None
+
+    return _condition
+
+
+def any_element_present(*locators):
+    def _condition(driver):
+        for by, value in locators:
+            elements = driver.find_elements(by, value)
+            if elements:
+                return elements[0]
+        return None
+
+    return _condition
+
+
+def wait_for_element(driver, by, value, timeout=WAIT_TIMEOUT):
+    return wait_until(
+        driver,
+        element_present(by, value),
+        timeout=timeout,
+        message=f"Element {value} not found within {timeout} seconds",
+    )
+
+
+class PacingPolicy:
+    def __init__(self, min_interval=PACING_MIN_INTERVAL, jitter=PACING_JITTER):
+        self.min_interval = min_interval
+        self.jitter = jitter
+        self._last_action = {}
+        self._lock = threading.Lock()
+
+    def wait(self, key=None):
+        """Sleep only for whatever is left of the floor since ``key``'s last action."""
+        with self._lock:
+            last = self._last_action.get(key)
+        if last is not None:
+            floor = self.min_interval + random.uniform(0, self.jitter)
+            remaining = floor - (time.monotonic() - last)
+            if remaining > 0:
+                time.sleep(remaining)
+        with self._lock:
+            self._last_action[key] = time.monotonic()
+
+
+human_pacing = PacingPolicy()
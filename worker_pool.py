@@ -0,0 +1,110 @@
+import argparse
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+from automation_functions import QUEUE_IDLE_POLL, QueueWorker
+from driver_pool import DRIVER_POOL_WARM, driver_pool
+from driver_resolver import resolve_chromedriver
+
+# Worker processes draining the LinkedIn job queue. Only `python -m worker_pool` starts
+# them, and only one of those may run: shard i of n must have a single owner, or two
+# processes would drive the same account's browser and session at once.
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", "2"))
+# Seconds a worker gets to close its browsers after SIGTERM before it is killed
+WORKER_STOP_TIMEOUT = int(os.getenv("WORKER_STOP_TIMEOUT", "30"))
+
+
+def _exit_on_sigterm(signum, frame):
+    # Unwinds through the finally blocks, so browsers and chromedrivers are closed
+    raise SystemExit(0)
+
+
+def run_worker_process(index, count):
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+    driver_pool.warm(DRIVER_POOL_WARM)
+    worker = QueueWorker(shard=(index, count))
+    try:
+        while True:
+            if not worker.run_once():
+                # Give browsers back to the pool while there is nothing to do
+                worker.close()
+                time.sleep(QUEUE_IDLE_POLL)
+    finally:
+        worker.close()
+        driver_pool.shutdown()
+
+
+class WorkerPool:
+    """Keeps one process per shard of accounts alive, each with its own browsers."""
+
+    def __init__(self, processes=WORKER_PROCESSES):
+        self.processes = processes
+        self._workers = {}
+        self._lock = threading.Lock()
+        # Fresh interpreters; forked children would share the parent's Mongo sockets
+        self._context = multiprocessing.get_context("spawn")
+
+    def ensure(self):
+        """Start missing worker processes and replace dead ones."""
+        with self._lock:
+            for index in range(self.processes):
+                process = self._workers.get(index)
+                if process is not None and process.is_alive():
+                    continue
+                if process is not None:
+                    print(f"Worker {index} exited with {process.exitcode}, restarting")
+                process = self._context.Process(
+                    target=run_worker_process,
+                    args=(index, self.processes),
+                    name=f"linkedin-worker-{index}",
+                    daemon=True,
+                )
+                process.start()
+                self._workers[index] = process
+
+    def shutdown(self, timeout=WORKER_STOP_TIMEOUT):
+        with self._lock:
+            for process in self._workers.values():
+                process.terminate()
+            deadline = time.monotonic() + timeout
+            for index, process in self._workers.items():
+                process.join(max(deadline - time.monotonic(), 0))
+                if process.is_alive():
+                    print(f"Worker {index} did not stop in {timeout}s, killing it")
+                    process.kill()
+                    process.join()
+            self._workers.clear()
+
+    def stats(self) -> list:
+        with self._lock:
+            return [
+                {"index": index, "pid": process.pid, "alive": process.is_alive()}
+                for index, process in sorted(self._workers.items())
+            ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run LinkedIn queue workers")
+    parser.add_argument("--processes", type=int, default=max(WORKER_PROCESSES, 1))
+    args = parser.parse_args()
+
+    # Resolve chromedriver once so the workers all read the same lockfile
+    resolve_chromedriver()
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+    pool = WorkerPool(args.processes)
+    try:
+        while True:
+            # Picks up jobs left over from before a restart and replaces crashed workers
+            pool.ensure()
+            time.sleep(5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()